@@ -0,0 +1,140 @@
+"""
+Benchmarks for the headless engine.
+    python benchmark.py imports
+    python benchmark.py scaling --sizes 10 50 200 1000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from bitboard import placement_bits
+from config import GameConfig
+from density import fleet_placements, placement_cells
+from engine import BotGame, fleet_boards, generate_random_fleets
+
+LOCAL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that simulation workers and tests import. None of them should pull in pygame.
+HEADLESS_MODULES = [
+    "config", "density", "engine", "game_trace", "gradient", "opening_book", "replay", "simulate", "strategies",
+    "tournament", "verify"
+]
+
+IMPORT_PROBE = """
+import sys, time
+start = time.perf_counter()
+import {module}
+print(time.perf_counter() - start, "pygame" in sys.modules)
+"""
+
+
+def measure_import(module, repeats=5):
+    """
+    Best of several cold imports of a module, each in a fresh interpreter.
+    Returns (seconds, whether pygame got imported along the way).
+    """
+    best = None
+    loaded_pygame = False
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", IMPORT_PROBE.format(module=module)],
+            cwd=LOCAL_DIR, capture_output=True, text=True, check=True
+        ).stdout.split()
+
+        seconds = float(output[0])
+        best = seconds if best is None else min(best, seconds)
+        loaded_pygame = loaded_pygame or output[1] == "True"
+    return best, loaded_pygame
+
+
+def run_imports(args):
+    baseline, _ = measure_import("numpy", args.repeats)
+    print(f"{'numpy':10s} {baseline * 1000:8.1f} ms")
+
+    for module in HEADLESS_MODULES:
+        seconds, loaded_pygame = measure_import(module, args.repeats)
+        note = "  <-- imports pygame" if loaded_pygame else ""
+        print(f"{module:10s} {seconds * 1000:8.1f} ms{note}")
+
+
+def play_moves(config, moves, seed=0):
+    """
+    Set up one bot game on a random board of the config and play up to moves shots of it.
+    Returns (setup seconds, per move seconds array).
+    """
+    start = time.perf_counter()
+    ship_ids = fleet_boards(generate_random_fleets(1, np.random.default_rng(seed), config), config, ship_ids=True)[0]
+    game = BotGame(ship_ids != 0, config, ship_ids=ship_ids)
+    setup = time.perf_counter() - start
+
+    latencies = []
+    while len(latencies) < moves and not game.is_over():
+        start = time.perf_counter()
+        game.step()
+        latencies.append(time.perf_counter() - start)
+    return setup, np.array(latencies)
+
+
+def clear_caches():
+    """Drop the cached placement tables so the next game builds them again."""
+    placement_cells.cache_clear()
+    placement_bits.cache_clear()
+    fleet_placements.cache_clear()
+
+
+def measure_scaling(config, moves, seed=0):
+    """
+    Returns (setup seconds, per move seconds array, peak traced bytes), all starting from empty placement caches.
+    Memory is traced in a second identical game so tracing does not slow down the timed one.
+    numpy reports its allocations to tracemalloc, so the peak covers the placement tables too.
+    """
+    clear_caches()
+    setup, latencies = play_moves(config, moves, seed)
+
+    clear_caches()
+    tracemalloc.start()
+    play_moves(config, moves, seed)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return setup, latencies, peak
+
+
+def run_scaling(args):
+    print(f"{'board':>6s} {'ships':>6s} {'setup':>10s} {'mean move':>10s} {'p95 move':>10s} {'moves':>6s} {'peak memory':>12s}")
+    for board_size in args.sizes:
+        config = GameConfig.scaled(board_size)
+        setup, latencies, peak = measure_scaling(config, args.moves)
+        print(
+            f"{board_size:6d} {len(config.ships):6d} {setup * 1000:8.1f} ms"
+            f" {latencies.mean() * 1000:7.3f} ms {np.percentile(latencies, 95) * 1000:7.3f} ms"
+            f" {len(latencies):6d} {peak / 2 ** 20:9.1f} MiB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks for the headless engine.")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    imports = subparsers.add_parser("imports", help="cold import time of the headless modules")
+    imports.add_argument("--repeats", type=int, default=5)
+    imports.set_defaults(run=run_imports)
+
+    scaling = subparsers.add_parser(
+        "scaling", help="per move latency and peak memory of the bot on larger boards with scaled fleets"
+    )
+    scaling.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200, 1000])
+    scaling.add_argument("--moves", type=int, default=200, help="shots timed per board, fewer if the game ends")
+    scaling.set_defaults(run=run_scaling)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == '__main__':
+    main()
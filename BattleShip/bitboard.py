@@ -0,0 +1,224 @@
+import numpy as np
+from functools import lru_cache
+
+from config import DEFAULT_CONFIG
+from density import placement_cells
+
+
+def word_count(board_size):
+    """Number of uint64 words needed to hold one bit per cell."""
+    return -(-board_size * board_size // 64)
+
+
+def pack_cells(cells):
+    """Pack a (..., cell_count) boolean array into (..., words) little endian uint64 words. Cell i is bit i."""
+    cells = np.asarray(cells, dtype=bool)
+    words = -(-cells.shape[-1] // 64)
+
+    packed = np.zeros(cells.shape[:-1] + (words * 8,), dtype=np.uint8)
+    packed[..., :-(-cells.shape[-1] // 8)] = np.packbits(cells, axis=-1, bitorder="little")
+    return packed.view("<u8")
+
+
+def unpack_cells(words, cell_count):
+    """Inverse of pack_cells. Returns a (..., cell_count) boolean array."""
+    words = np.ascontiguousarray(words, dtype="<u8")
+    bits = np.unpackbits(words.view(np.uint8), axis=-1, count=cell_count, bitorder="little")
+    return bits.astype(bool)
+
+
+@lru_cache(maxsize=None)
+def placement_bits(board_size, length_of_the_ship):
+    """The placements of placement_cells as (placements, words) bitmasks, built once per ship length."""
+    cells, _ = placement_cells(board_size, length_of_the_ship)
+
+    masks = np.zeros((len(cells), board_size * board_size), dtype=bool)
+    masks[np.arange(len(cells))[:, None], cells] = True
+
+    bits = pack_cells(masks)
+    bits.setflags(write=False)
+    return bits
+
+
+@lru_cache(maxsize=None)
+def column_mask(board_size, col):
+    """Bits of every cell in one column, used to stop shifts wrapping into the next row."""
+    mask = 0
+    for row in range(board_size):
+        mask |= 1 << (row * board_size + col)
+    return mask
+
+
+class Bitboard:
+    """
+    Immutable set of cells on a square board stored as one Python int. Cell (row, col) is bit row * board_size + col.
+    A 10x10 board fits in 100 bits, so a whole board costs a couple of machine words instead of a numpy array.
+    """
+
+    __slots__ = ("bits", "board_size")
+
+    def __init__(self, bits=0, board_size=10):
+        self.bits = bits
+        self.board_size = board_size
+
+    @classmethod
+    def from_array(cls, array, value=None):
+        """Cells of a 2D array that are nonzero, or equal to value if given."""
+        mask = array != 0 if value is None else array == value
+        packed = np.packbits(mask.ravel(), bitorder="little")
+        return cls(int.from_bytes(packed.tobytes(), "little"), array.shape[0])
+
+    @classmethod
+    def from_words(cls, words, board_size=10):
+        """From one row of pack_cells output."""
+        return cls(int.from_bytes(np.ascontiguousarray(words, dtype="<u8").tobytes(), "little"), board_size)
+
+    @classmethod
+    def from_cells(cls, cells, board_size=10):
+        """From an iterable of flat cell indices."""
+        bits = 0
+        for cell in cells:
+            bits |= 1 << int(cell)
+        return cls(bits, board_size)
+
+    def to_array(self, value=1, dtype=int):
+        """(board_size, board_size) array with value on every set cell and 0 elsewhere."""
+        cell_count = self.board_size * self.board_size
+        packed = np.frombuffer(self.bits.to_bytes(-(-cell_count // 8), "little"), dtype=np.uint8)
+        cells = np.unpackbits(packed, count=cell_count, bitorder="little")
+        return (cells.reshape(self.board_size, self.board_size) * value).astype(dtype)
+
+    def to_words(self):
+        """Same layout as one row of pack_cells output."""
+        return np.frombuffer(self.bits.to_bytes(word_count(self.board_size) * 8, "little"), dtype="<u8").copy()
+
+    @property
+    def full(self):
+        """Mask with every cell of the board set."""
+        return (1 << (self.board_size * self.board_size)) - 1
+
+    def popcount(self):
+        return bin(self.bits).count("1")
+
+    def __len__(self):
+        return self.popcount()
+
+    def __bool__(self):
+        return self.bits != 0
+
+    def __contains__(self, position):
+        row, col = position
+        return (self.bits >> int(row * self.board_size + col)) & 1 == 1
+
+    def __eq__(self, other):
+        return isinstance(other, Bitboard) and self.bits == other.bits and self.board_size == other.board_size
+
+    def __hash__(self):
+        return hash((self.bits, self.board_size))
+
+    def __repr__(self):
+        return f"Bitboard({self.bits:#x}, board_size={self.board_size})"
+
+    def __and__(self, other):
+        return Bitboard(self.bits & other.bits, self.board_size)
+
+    def __or__(self, other):
+        return Bitboard(self.bits | other.bits, self.board_size)
+
+    def __xor__(self, other):
+        return Bitboard(self.bits ^ other.bits, self.board_size)
+
+    def __sub__(self, other):
+        return Bitboard(self.bits & ~other.bits, self.board_size)
+
+    def __invert__(self):
+        return Bitboard(~self.bits & self.full, self.board_size)
+
+    def overlaps(self, other):
+        return self.bits & other.bits != 0
+
+    def with_cell(self, row, col):
+        return Bitboard(self.bits | 1 << int(row * self.board_size + col), self.board_size)
+
+    def shift(self, d_row, d_col):
+        """Move every cell by (d_row, d_col). Cells that would leave the board are dropped, nothing wraps around."""
+        bits = self.bits
+        for _ in range(abs(d_col)):
+            if d_col > 0:
+                bits = (bits & ~column_mask(self.board_size, self.board_size - 1)) << 1
+            else:
+                bits = (bits & ~column_mask(self.board_size, 0)) >> 1
+
+        if d_row > 0:
+            bits <<= d_row * self.board_size
+        else:
+            bits >>= -d_row * self.board_size
+
+        return Bitboard(bits & self.full, self.board_size)
+
+    def neighbours(self):
+        """Cells orthogonally adjacent to any set cell, not including the set cells themselves."""
+        adjacent = self.shift(1, 0) | self.shift(-1, 0) | self.shift(0, 1) | self.shift(0, -1)
+        return adjacent - self
+
+    def flat_cells(self):
+        """Every set cell as a flat index row * board_size + col, in order."""
+        return [row * self.board_size + col for row, col in self.cells()]
+
+    def cells(self):
+        """Every set cell as (row, col), in flat index order."""
+        bits = self.bits
+        while bits:
+            low_bit = bits & -bits
+            yield divmod(low_bit.bit_length() - 1, self.board_size)
+            bits ^= low_bit
+
+
+@lru_cache(maxsize=None)
+def placement_bitboards(board_size, length_of_the_ship):
+    """Every legal placement of a ship as a Bitboard, so checking a candidate placement is a set lookup."""
+    cells, _ = placement_cells(board_size, length_of_the_ship)
+    return frozenset(Bitboard.from_cells(placement, board_size) for placement in cells)
+
+
+class ShotBoard:
+    """The hits and misses fired at one board, as a pair of Bitboards."""
+
+    def __init__(self, board_size=10):
+        self.hits = Bitboard(0, board_size)
+        self.misses = Bitboard(0, board_size)
+
+    def record(self, row, col, is_hit):
+        if is_hit:
+            self.hits = self.hits.with_cell(row, col)
+        else:
+            self.misses = self.misses.with_cell(row, col)
+
+    def is_shot(self, row, col):
+        return (row, col) in self.hits or (row, col) in self.misses
+
+    def to_array(self):
+        """The hits/misses layout used by the display. 0 unknown, 1 hit, 2 miss."""
+        return self.hits.to_array(1) + self.misses.to_array(2)
+
+
+class FleetState:
+    """
+    What the shooter knows about the opponent's fleet: which ships are still afloat and where the sunk ones were.
+    Sunk ships drop out of the placement search and their cells count as misses.
+    """
+
+    def __init__(self, config=DEFAULT_CONFIG):
+        self.remaining = list(config.ships)
+        self.sunk = []
+        self.sunk_cells = Bitboard(0, config.board_size)
+
+    def record_sink(self, ship):
+        """ship is the Bitboard of the sunk ship's cells."""
+        length_of_the_ship = ship.popcount()
+        self.remaining.remove(length_of_the_ship)
+        self.sunk.append(length_of_the_ship)
+        self.sunk_cells = self.sunk_cells | ship
+
+    def is_defeated(self):
+        return len(self.remaining) == 0
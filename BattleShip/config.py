@@ -0,0 +1,49 @@
+CLASSIC_FLEET = (5, 4, 3, 3, 2)
+
+
+class GameConfig:
+    """
+    Board size and fleet of a game. Board generation, the probability engine, the players and the display
+    all read them from here instead of assuming a 10x10 board with the classic fleet.
+    """
+
+    def __init__(self, board_size=10, ships=CLASSIC_FLEET):
+        ships = tuple(int(length) for length in ships)
+
+        if board_size < 1:
+            raise ValueError(f"The board needs at least one cell, got board_size={board_size}.")
+        if not ships or min(ships) < 1:
+            raise ValueError(f"The fleet needs at least one ship and every ship needs a length, got {ships}.")
+        if max(ships) > board_size:
+            raise ValueError(f"A {max(ships)} long ship does not fit on a {board_size}x{board_size} board.")
+        if sum(ships) > board_size * board_size:
+            raise ValueError(f"{sum(ships)} ship cells do not fit on a {board_size}x{board_size} board.")
+
+        self.board_size = board_size
+        self.ships = ships
+
+    @classmethod
+    def scaled(cls, board_size, ships=CLASSIC_FLEET):
+        """One copy of the fleet per 10 cells of board width, so large boards keep a comparable fleet."""
+        return cls(board_size, ships * max(1, board_size // 10))
+
+    @property
+    def cell_count(self):
+        return self.board_size * self.board_size
+
+    @property
+    def ship_cell_count(self):
+        """Hits needed to win."""
+        return sum(self.ships)
+
+    def __eq__(self, other):
+        return isinstance(other, GameConfig) and (self.board_size, self.ships) == (other.board_size, other.ships)
+
+    def __hash__(self):
+        return hash((self.board_size, self.ships))
+
+    def __repr__(self):
+        return f"GameConfig(board_size={self.board_size}, ships={self.ships})"
+
+
+DEFAULT_CONFIG = GameConfig()
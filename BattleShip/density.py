@@ -0,0 +1,308 @@
+import numpy as np
+from collections import Counter
+from functools import lru_cache
+
+# Boards with more cells than this store placement cells as int32. Gathers with native intp indices are faster,
+# but on large boards the placement table is tens of millions of entries and halving it matters more
+COMPACT_INDEX_CELLS = 1 << 16
+
+
+@lru_cache(maxsize=None)
+def placement_cells(board_size, length_of_the_ship):
+    """
+    Every horizontal and vertical placement of a ship, built once per (board size, ship length).
+
+    Returns (cells, is_horizontal):
+        cells is a read only (placements, length) array of flat cell indices. Each row is the
+        nonzero part of that placement's 0/1 mask, so it is the placement mask tensor stored sparsely.
+        is_horizontal flags which rows are horizontal placements. They come first, ordered by start cell.
+    """
+    starts = board_size - length_of_the_ship + 1
+    offsets = np.arange(length_of_the_ship)
+
+    if starts <= 0:
+        cells = np.empty((0, length_of_the_ship), dtype=np.int32)
+        is_horizontal = np.empty(0, dtype=bool)
+    else:
+        # Horizontal: any row, start column in range(starts)
+        rows, cols = np.meshgrid(np.arange(board_size), np.arange(starts), indexing="ij")
+        horizontal = (rows * board_size + cols).reshape(-1, 1) + offsets
+
+        # Vertical: start row in range(starts), any column
+        rows, cols = np.meshgrid(np.arange(starts), np.arange(board_size), indexing="ij")
+        vertical = (rows * board_size + cols).reshape(-1, 1) + offsets * board_size
+
+        cells = np.concatenate((horizontal, vertical)).astype(np.int32)
+        is_horizontal = np.arange(len(cells)) < len(horizontal)
+
+    cells.setflags(write=False)
+    is_horizontal.setflags(write=False)
+    return cells, is_horizontal
+
+
+class FleetPlacements:
+    """
+    The placements of every ship length in a fleet stacked into one table, so a whole fleet
+    is scored with a single gather and a single bincount.
+
+    cells has one column per placement and one row per ship segment, so reducing over a
+    placement is an elementwise operation across a handful of contiguous rows.
+    Placements shorter than the longest ship are padded with the index board_size ** 2,
+    which points at an always empty cell past the end of the board.
+    """
+
+    def __init__(self, board_size, ships):
+        self.board_size = board_size
+        self.cell_count = board_size * board_size
+
+        lengths = Counter(ships)
+        width = max(lengths)
+        index_dtype = np.int32 if self.cell_count > COMPACT_INDEX_CELLS else np.intp
+
+        groups = [
+            (length_of_the_ship, count, placement_cells(board_size, length_of_the_ship))
+            for length_of_the_ship, count in sorted(lengths.items(), reverse=True)
+        ]
+
+        # Filled in place, transposed, so large boards never hold a second copy of the table
+        self.width = width
+        self.cells = np.full((width, sum(len(ship_cells) for _, _, (ship_cells, _) in groups)), self.cell_count,
+                             dtype=index_dtype)
+
+        base_weights = []
+        is_horizontal = []
+        self.length_slices = dict()
+        placement_count = 0
+        for length_of_the_ship, count, (ship_cells, ship_is_horizontal) in groups:
+            group = slice(placement_count, placement_count + len(ship_cells))
+            self.length_slices[length_of_the_ship] = group
+            placement_count += len(ship_cells)
+
+            self.cells[:length_of_the_ship, group] = ship_cells.T
+            # Ships of equal length share placements, so they are weighted by how many there are
+            base_weights.append(np.full(len(ship_cells), float(length_of_the_ship * count)))
+            is_horizontal.append(ship_is_horizontal)
+
+        self.base_weights = np.concatenate(base_weights)
+        self.is_horizontal = np.concatenate(is_horizontal)
+
+        # Covering placements of the cells asked about so far. Only cells that get shot at are ever stored
+        self._covering = dict()
+
+    def covering(self, cell):
+        """
+        Indices of every placement that covers the flat cell.
+        Worked out from the placement_cells ordering, so large boards need no per cell index in memory.
+        """
+        cell = int(cell)
+        if cell not in self._covering:
+            self._covering[cell] = self._compute_covering(cell)
+        return self._covering[cell]
+
+    def _compute_covering(self, cell):
+        row, col = divmod(cell, self.board_size)
+
+        covering = []
+        for length_of_the_ship, group in self.length_slices.items():
+            starts = self.board_size - length_of_the_ship + 1
+            # Horizontal placements are numbered row * starts + start column, vertical ones start row * board_size + column
+            start_cols = np.arange(max(0, col - length_of_the_ship + 1), min(col, starts - 1) + 1)
+            start_rows = np.arange(max(0, row - length_of_the_ship + 1), min(row, starts - 1) + 1)
+            covering.append(group.start + row * starts + start_cols)
+            covering.append(group.start + self.board_size * starts + start_rows * self.board_size + col)
+
+        covering = np.concatenate(covering)
+        covering.setflags(write=False)
+        return covering
+
+    def weights(self, hit_cells, blocked_cells):
+        """
+        Weight of every placement given padded (cell_count + 1) hit and blocked cell arrays.
+        Illegal placements weigh 0. Legal ones weigh the ship length times the hit multiplier:
+        4 * hits for horizontal placements, a flat 4 for vertical ones, 1 when there are no hits.
+        """
+        legal = ~blocked_cells[self.cells].any(axis=0)
+        hits_in_placement = hit_cells[self.cells].sum(axis=0, dtype=np.int16)
+        return self.weigh(legal, hits_in_placement)
+
+    def weigh(self, legal, hits_in_placement, placements=slice(None), base_weights=None):
+        """
+        Weights for the selected placements from their legality and hit counts.
+        base_weights overrides the length * count weights, for fleets that have lost ships.
+        """
+        if base_weights is None:
+            base_weights = self.base_weights[placements]
+
+        multiplier = np.where(self.is_horizontal[placements], 4 * hits_in_placement, 4)
+        multiplier[hits_in_placement == 0] = 1
+
+        return base_weights * multiplier * legal
+
+    def density(self, hit_cells, blocked_cells):
+        """Summed placement weights over each flat cell. Hit cells are zeroed."""
+        return self.spread(self.weights(hit_cells, blocked_cells), hit_cells)
+
+    def spread(self, weights, hit_cells):
+        """Sum already computed placement weights over each flat cell. Hit cells are zeroed."""
+        # One bincount per ship segment keeps memory at one placement sized array, even on large boards
+        density = np.zeros(self.cell_count + 1)
+        for segment in self.cells:
+            density += np.bincount(segment, weights=weights, minlength=self.cell_count + 1)
+
+        density = density[:self.cell_count]
+        density[hit_cells[:self.cell_count]] = 0
+        return density
+
+
+@lru_cache(maxsize=None)
+def fleet_placements(board_size, ships):
+    return FleetPlacements(board_size, ships)
+
+
+@lru_cache(maxsize=None)
+def parity_masks(board_size, length_of_the_ship):
+    """
+    Read only (length, board_size, board_size) parity lattices. Lattice k holds the cells with (row + col) % length == k.
+    Every placement of a ship at least that long covers a cell of each lattice.
+    """
+    rows, cols = np.indices((board_size, board_size))
+    masks = (rows + cols) % length_of_the_ship == np.arange(length_of_the_ship)[:, None, None]
+    masks.setflags(write=False)
+    return masks
+
+
+def padded_hit_and_blocked_cells(board_with_hits, board_with_misses):
+    """Flat hit and blocked cells with the extra always empty padding cell on the end."""
+    cell_count = board_with_hits.size
+
+    blocked_cells = np.zeros(cell_count + 1, dtype=bool)
+    blocked_cells[:cell_count] = board_with_misses.ravel() != 0
+
+    hit_cells = np.zeros(cell_count + 1, dtype=bool)
+    hit_cells[:cell_count] = board_with_hits.ravel() == 1
+    hit_cells &= ~blocked_cells
+
+    return hit_cells, blocked_cells
+
+
+def fleet_density(board_with_hits, board_with_misses, ships):
+    """
+    Heatmap of the summed weight of all legal placements of every ship in the fleet.
+    Misses are any nonzero cell of board_with_misses, hits are cells of board_with_hits equal to 1.
+    """
+    board_size = board_with_hits.shape[0]
+    hit_cells, blocked_cells = padded_hit_and_blocked_cells(board_with_hits, board_with_misses)
+    density = fleet_placements(board_size, tuple(ships)).density(hit_cells, blocked_cells)
+    return density.reshape(board_size, board_size)
+
+
+def ship_density(board_with_hits, board_with_misses, length_of_the_ship):
+    return fleet_density(board_with_hits, board_with_misses, (length_of_the_ship,))
+
+
+class IncrementalDensity:
+    """
+    Running fleet heatmap that is patched after every shot instead of rescored from scratch.
+
+    A shot only changes the placements covering the cell that was fired on, so only those
+    placements are reweighted and only the cells they cover are updated in the heatmap.
+    The result always matches fleet_density on the same hits and misses.
+
+    Sunk ships are dropped from the fleet with record_sink. The heatmap then matches fleet_density
+    for the remaining ships with the sunk cells counted as misses.
+    """
+
+    def __init__(self, board_size, ships, board_with_hits=None, board_with_misses=None):
+        self.board_size = board_size
+        self.placements = fleet_placements(board_size, tuple(ships))
+
+        if board_with_hits is None:
+            board_with_hits = np.zeros((board_size, board_size))
+        if board_with_misses is None:
+            board_with_misses = np.zeros((board_size, board_size))
+
+        self.hit_cells, self.blocked_cells = padded_hit_and_blocked_cells(board_with_hits, board_with_misses)
+
+        # Ships still afloat per length and the matching per placement base weights
+        self.remaining = Counter(ships)
+        self.base_weights = self.placements.base_weights.copy()
+
+        cells = self.placements.cells
+        self.legal = ~self.blocked_cells[cells].any(axis=0)
+        self.hits_in_placement = self.hit_cells[cells].sum(axis=0, dtype=np.int16)
+        self.weights = self.placements.weigh(self.legal, self.hits_in_placement)
+
+        # Padded like the cell arrays so updates can scatter into the padding cell without a check
+        self._density = np.zeros(self.placements.cell_count + 1)
+        self._density[:self.placements.cell_count] = self.placements.spread(self.weights, self.hit_cells)
+
+    @property
+    def probabilities(self):
+        """The current (board_size, board_size) heatmap. A view, so it changes as shots are recorded."""
+        return self._density[:self.placements.cell_count].reshape(self.board_size, self.board_size)
+
+    def record_shot(self, row, col, is_hit):
+        cell = row * self.board_size + col
+        if self.hit_cells[cell] or self.blocked_cells[cell]:
+            return
+
+        affected = self.placements.covering(cell)
+
+        if is_hit:
+            self.hit_cells[cell] = True
+            self.hits_in_placement[affected] += 1
+        else:
+            self.blocked_cells[cell] = True
+            self.legal[affected] = False
+
+        self._reweigh(affected)
+
+    def record_sink(self, length_of_the_ship, cells):
+        """Drop one ship of that length from the fleet and block the flat cells it was sunk on."""
+        if self.remaining[length_of_the_ship] == 0:
+            raise ValueError(f"No {length_of_the_ship} long ship left to sink.")
+        self.remaining[length_of_the_ship] -= 1
+
+        group = self.placements.length_slices[length_of_the_ship]
+        self.base_weights[group] = float(length_of_the_ship * self.remaining[length_of_the_ship])
+
+        affected = [np.arange(group.start, group.stop)]
+        for cell in cells:
+            self.blocked_cells[cell] = True
+            covering = self.placements.covering(cell)
+            self.legal[covering] = False
+            affected.append(covering)
+
+        self._reweigh(np.unique(np.concatenate(affected)))
+
+    def density_around(self, cells):
+        """
+        (board_size, board_size) heatmap of only the placements covering at least one of the flat cells.
+        Hit cells read 0 like in probabilities.
+        """
+        placements = np.unique(np.concatenate([self.placements.covering(cell) for cell in cells]))
+        density = np.bincount(
+            self.placements.cells[:, placements].ravel(),
+            weights=np.tile(self.weights[placements], self.placements.width),
+            minlength=self.placements.cell_count + 1
+        )[:self.placements.cell_count]
+        density[self.hit_cells[:self.placements.cell_count]] = 0
+        return density.reshape(self.board_size, self.board_size)
+
+    def _reweigh(self, affected):
+        """Recompute the weights of the affected placements and patch their change into the heatmap."""
+        new_weights = self.placements.weigh(
+            self.legal[affected],
+            self.hits_in_placement[affected],
+            affected,
+            self.base_weights[affected]
+        )
+
+        delta = new_weights - self.weights[affected]
+        self.weights[affected] = new_weights
+
+        affected_cells = self.placements.cells[:, affected]
+        np.add.at(self._density, affected_cells.ravel(), np.tile(delta, self.placements.width))
+
+        # Hit cells always read 0, including the one that was just fired on
+        self._density[affected_cells[self.hit_cells[affected_cells]]] = 0
@@ -0,0 +1,408 @@
+import time
+
+import numpy as np
+import pygame
+from functools import lru_cache
+
+from gradient import gradient_colors
+
+# Dimensions
+SCREEN_SIZE = 500
+BORDER = 20
+TEXT_HEIGHT = 85
+
+# Rendered text surfaces kept by render_text
+TEXT_CACHE_SIZE = 256
+
+# Tiles narrower than this are drawn without their border, it would cover the whole tile
+MIN_BORDERED_TILE = 5
+
+# Past this many changed tiles one blit of the whole board is cheaper than repainting them one by one
+MAX_DIRTY_TILES = 32
+
+# Colors
+COLOR_A = (255, 0, 0)  # In this case red
+COLOR_B = (0, 255, 0)  # In this case green
+BACKGROUND_COLOR = (150, 150, 150)
+TEXT_COLOR = (0, 0, 0)
+GRID_COLOR = (50, 50, 50)
+
+# Which plot should be display currently
+PLOT_DISPLAY = 0  # 0 --> HitsMisses; 1 --> Probabilities
+
+# Created on first use so nothing opens a window or scans fonts until a UI is actually shown
+_SCREEN = None
+_DISPLAY_FONT = None
+
+# Renderer of the board currently on screen, see draw_board
+_BOARD_RENDERER = None
+
+
+def get_screen():
+    global _SCREEN
+
+    if _SCREEN is None:
+        _SCREEN = pygame.display.set_mode((SCREEN_SIZE, SCREEN_SIZE + TEXT_HEIGHT))
+    return _SCREEN
+
+
+def get_font():
+    global _DISPLAY_FONT
+
+    if _DISPLAY_FONT is None:
+        pygame.font.init()
+        _DISPLAY_FONT = pygame.font.SysFont("Arial", 30)
+    return _DISPLAY_FONT
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(text, color=TEXT_COLOR):
+    """Text rendered in the display font. Cached, so the surface is shared and must only be blitted."""
+    return get_font().render(text, True, color)
+
+
+def blit_text(screen, text, position, color=TEXT_COLOR):
+    """
+    Blit one line of text and return the rectangle it covers. text is a string, or a sequence of strings
+    drawn one after the other so a line with a changing number only has to render the number.
+    """
+    if isinstance(text, str):
+        text = (text,)
+
+    x, y = position
+    rect = pygame.Rect(x, y, 0, 0)
+    for part in text:
+        surface = render_text(part, color)
+        rect.union_ip(screen.blit(surface, (x, y)))
+        x += surface.get_width()
+    return rect
+
+
+def tile_width(board_size):
+    """Width in pixels of one tile so the whole board fits on the screen. Never less than a pixel."""
+    return max(1, (SCREEN_SIZE - BORDER * 2) // board_size)
+
+
+def board_colors(matrix, is_probability_plot):
+    """(board_size, board_size, 3) uint8 RGB color of every tile."""
+    max_val = np.max(matrix)
+    min_val = np.min(matrix)
+
+    if is_probability_plot:
+        # Simple error checking in case all matrix values are equal
+        # Just draw all tiles the same color. Dont do any lerping
+        if max_val == min_val:
+            t = np.full(matrix.shape, .5)
+        else:
+            t = (matrix - min_val) / (max_val - min_val)
+
+    # This is for the hit/misses map so t values are ordered based on what integer corresponds to a git/miss/unkown
+    else:
+        t = np.array((.5, 1, 0))[np.rint(matrix).astype(int)]
+
+    # Every tile color in one table lookup
+    return gradient_colors(t, COLOR_A, COLOR_B, "hsv")
+
+
+@lru_cache(maxsize=None)
+def grid_overlay(board_size):
+    """Transparent surface the size of the board with the border of every tile drawn on it. Built once per size."""
+    tile = tile_width(board_size)
+    overlay = pygame.Surface((tile * board_size, tile * board_size), pygame.SRCALPHA)
+
+    if tile >= MIN_BORDERED_TILE:
+        for x in range(board_size):
+            for y in range(board_size):
+                pygame.draw.rect(overlay, GRID_COLOR, (tile * x, tile * y, tile, tile), 2)
+    return overlay
+
+
+class BoardRenderer:
+    """
+    Draws a board from a (board_size, board_size, 3) color array and keeps the last one it drew.
+
+    A full draw builds a one pixel per tile surface with surfarray, scales it up with a single blit
+    and blits the cached grid overlay on top. Later draws only repaint the tiles whose color changed
+    and hand back just their rectangles, so the caller can pass them to pygame.display.update.
+    """
+
+    def __init__(self, board_size):
+        self.board_size = board_size
+        self.tile = tile_width(board_size)
+        self.rect = pygame.Rect(BORDER, BORDER, self.tile * board_size, self.tile * board_size)
+        self.colors = None
+
+    def invalidate(self):
+        """Forget what is on screen, the next draw repaints everything."""
+        self.colors = None
+
+    def draw(self, screen, colors):
+        """Draw the board and return the list of screen rectangles that changed."""
+        if self.colors is None:
+            screen.fill(BACKGROUND_COLOR, (0, 0, SCREEN_SIZE, SCREEN_SIZE))
+            self._draw_all(screen, colors)
+            dirty = [pygame.Rect(0, 0, SCREEN_SIZE, SCREEN_SIZE)]
+        else:
+            changed = np.argwhere((colors != self.colors).any(axis=2))
+            if len(changed) > MAX_DIRTY_TILES:
+                self._draw_all(screen, colors)
+                dirty = [self.rect.copy()]
+            else:
+                dirty = [self._draw_tile(screen, colors, y, x) for y, x in changed]
+
+        self.colors = colors.copy()
+        return dirty
+
+    def _draw_all(self, screen, colors):
+        # surfarray indexes surfaces (x, y), the boards are (row, col)
+        surface = pygame.surfarray.make_surface(colors.swapaxes(0, 1))
+        screen.blit(pygame.transform.scale(surface, self.rect.size), self.rect)
+        screen.blit(grid_overlay(self.board_size), self.rect)
+
+    def _draw_tile(self, screen, colors, y, x):
+        rect = pygame.Rect(self.rect.x + self.tile * x, self.rect.y + self.tile * y, self.tile, self.tile)
+        screen.fill(colors[y, x], rect)
+        screen.blit(grid_overlay(self.board_size), rect, rect.move(-self.rect.x, -self.rect.y))
+        return rect
+
+
+def invalidate_board():
+    """Call after drawing anything else over the board area, so the next board draw repaints it all."""
+    global _BOARD_RENDERER
+    _BOARD_RENDERER = None
+
+
+def draw_board(matrix, is_probability_plot):
+    """Draw a board on the screen without updating the display. Returns the dirty rectangles."""
+    global _BOARD_RENDERER
+
+    board_size = matrix.shape[0]
+    if _BOARD_RENDERER is None or _BOARD_RENDERER.board_size != board_size:
+        _BOARD_RENDERER = BoardRenderer(board_size)
+
+    return _BOARD_RENDERER.draw(get_screen(), board_colors(matrix, is_probability_plot))
+
+
+def draw_caption(top_text, bot_text):
+    """
+    Draw the two lines of text under the board without updating the display. Returns the dirty rectangle.
+    Either line can be split into parts like blit_text takes.
+    """
+    screen = get_screen()
+    rect = pygame.Rect(0, SCREEN_SIZE, SCREEN_SIZE, TEXT_HEIGHT)
+    screen.fill(BACKGROUND_COLOR, rect)
+
+    top_rect = blit_text(screen, top_text, (BORDER, SCREEN_SIZE))
+    blit_text(screen, bot_text, (BORDER, SCREEN_SIZE + top_rect.height))
+    return rect
+
+
+def display_plot(matrix, turn_count, title, is_probability_plot):
+    dirty = draw_board(matrix, is_probability_plot)
+    dirty.append(draw_caption(
+        (f"{title}. Turn: ", str(turn_count), ". Space for next turn."),
+        "ESC to exit. Left Shift to switch plots."
+    ))
+
+    # Update only what changed so we can actually see the changes
+    pygame.display.update(dirty)
+
+
+class Scene:
+    """
+    One screen of the UI, driven by run_scene. Subclasses draw themselves and react to events.
+    Set done (and result) to leave the scene.
+    """
+
+    # Milliseconds between calls to tick, for scenes that have to notice something other than input. None never ticks
+    tick_interval = None
+
+    def __init__(self):
+        self.done = False
+        self.result = None
+
+    def draw(self):
+        """Draw the scene and update the display."""
+        raise NotImplementedError
+
+    def handle_event(self, event):
+        """React to one event. Returns True if the scene has to be redrawn."""
+        return False
+
+    def tick(self):
+        """Called every tick_interval. Returns True if the scene has to be redrawn."""
+        return False
+
+    def finish(self, result=None):
+        self.done = True
+        self.result = result
+
+
+def get_ticks():
+    """
+    Milliseconds on a monotonic clock, for scene timing.
+    pygame.time.get_ticks reads 0 until pygame.init has run, and only the display and font modules are ever set up.
+    """
+    return int(time.monotonic() * 1000)
+
+
+def is_quit_event(event):
+    return event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE)
+
+
+def run_scene(scene):
+    """
+    Run a scene until it is done and return its result.
+
+    Sleeps in pygame.event.wait until something happens, so a window waiting for input uses no CPU.
+    Every event that arrived in the meantime is handled before drawing, and the scene is only redrawn
+    if one of them changed it. Scenes with a tick_interval are ticked once per interval however many
+    events come in. Closing the window or Escape quits the program.
+    """
+    scene.draw()
+
+    next_tick = None if scene.tick_interval is None else get_ticks() + scene.tick_interval
+
+    while not scene.done:
+        if next_tick is None:
+            event = pygame.event.wait()
+        else:
+            event = pygame.event.wait(max(1, next_tick - get_ticks()))
+
+        # Handle everything that is already queued before drawing, one event at a time
+        # so whatever arrives after the scene is done stays queued for the next one
+        changed = False
+        while event.type != pygame.NOEVENT:
+            if is_quit_event(event):
+                pygame.quit()
+                quit()
+
+            changed |= bool(scene.handle_event(event))
+            if scene.done:
+                return scene.result
+            event = pygame.event.poll()
+
+        if next_tick is not None and get_ticks() >= next_tick:
+            changed |= bool(scene.tick())
+            next_tick += scene.tick_interval
+            if next_tick <= get_ticks():
+                # Running late. Ticks that were missed are skipped rather than made up in a burst
+                next_tick = get_ticks() + scene.tick_interval
+
+        if changed and not scene.done:
+            scene.draw()
+
+    return scene.result
+
+
+class KeyPromptScene(Scene):
+    """Shows whatever draw draws until key is pressed."""
+
+    def __init__(self, draw, key=pygame.K_SPACE):
+        super().__init__()
+        self._draw = draw
+        self.key = key
+
+    def draw(self):
+        self._draw()
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == self.key:
+            self.finish()
+        return False
+
+
+class PlotScene(Scene):
+    """The bot's view of one turn. Space moves on, Left Shift switches between the hits/misses and the heatmap."""
+
+    def __init__(self, board_with_probabilities, board_with_hits_misses, turn_count):
+        super().__init__()
+        self.board_with_probabilities = board_with_probabilities
+        self.board_with_hits_misses = board_with_hits_misses
+        self.turn_count = turn_count
+
+    def draw(self):
+        if PLOT_DISPLAY == 0:
+            display_plot(self.board_with_hits_misses, self.turn_count, "Hits/Misses", False)
+        else:
+            display_plot(self.board_with_probabilities, self.turn_count, "Probabilities", True)
+
+    def handle_event(self, event):
+        global PLOT_DISPLAY
+
+        if event.type == pygame.KEYDOWN:
+            # Exit so the AI computes and plays the next move
+            if event.key == pygame.K_SPACE:
+                self.finish()
+            # Toggle which map to display
+            elif event.key == pygame.K_LSHIFT:
+                PLOT_DISPLAY = (PLOT_DISPLAY + 1) % 2
+                return True
+        return False
+
+
+class ReplayScene(Scene):
+    """
+    Plays a replay.GameRecording back at fps turns a second.
+    Space pauses and resumes, the arrow keys step while paused, Left Shift switches plots and Enter leaves.
+    """
+
+    def __init__(self, recording, fps=4):
+        super().__init__()
+        self.recording = recording
+        self.tick_interval = max(1, round(1000 / fps))
+        self.turn = 0
+        self.paused = False
+
+    def draw(self):
+        if PLOT_DISPLAY == 0:
+            dirty = draw_board(self.recording.hits_misses(self.turn), False)
+            title = "Hits/Misses"
+        else:
+            dirty = draw_board(self.recording.heatmaps[self.turn], True)
+            title = "Probabilities"
+
+        state = "Paused" if self.paused else "Playing"
+        dirty.append(draw_caption(
+            (f"{title}. Turn: ", str(self.turn), "/", str(self.recording.turn_count), f". {state}."),
+            "Space to pause. Left Shift to switch plots."
+        ))
+        pygame.display.update(dirty)
+
+    def handle_event(self, event):
+        global PLOT_DISPLAY
+
+        if event.type != pygame.KEYDOWN:
+            return False
+
+        if event.key == pygame.K_SPACE:
+            # Resuming at the end starts over
+            if self.paused and self.turn == self.recording.turn_count:
+                self.turn = 0
+            self.paused = not self.paused
+        elif event.key == pygame.K_LSHIFT:
+            PLOT_DISPLAY = (PLOT_DISPLAY + 1) % 2
+        elif event.key == pygame.K_RIGHT and self.paused:
+            self.turn = min(self.turn + 1, self.recording.turn_count)
+        elif event.key == pygame.K_LEFT and self.paused:
+            self.turn = max(self.turn - 1, 0)
+        elif event.key == pygame.K_RETURN:
+            self.finish()
+            return False
+        else:
+            return False
+        return True
+
+    def tick(self):
+        if self.paused:
+            return False
+
+        if self.turn == self.recording.turn_count:
+            self.paused = True
+        else:
+            self.turn += 1
+        return True
+
+
+def generatePlot(board_with_probabilities, board_with_hits_misses, turn_count):
+    run_scene(PlotScene(board_with_probabilities, board_with_hits_misses, turn_count))
@@ -0,0 +1,318 @@
+from collections import deque
+
+import numpy as np
+
+from bitboard import Bitboard, pack_cells, placement_bits, word_count
+from config import DEFAULT_CONFIG
+from density import IncrementalDensity, fleet_density, placement_cells, ship_density
+from opening_book import opening_book
+from strategies import make_strategy
+
+# Boards sampled together by generate_random_fleets. Bounds the size of its (boards, placements, words) overlap test
+FLEET_BLOCK_SIZE = 4096
+
+# Wider boards than this many uint64 words are sampled one ship at a time by rejection instead.
+# The bulk overlap test costs boards * placements * words, which grows with the fourth power of the board size
+BITMASK_MAX_WORDS = 4
+
+# Rejected draws of one ship before generate_random_fleets enumerates its free placements instead
+REJECTION_ATTEMPTS = 64
+
+# Shared by calls that do not pass their own rng. Creating a Generator per board costs more than sampling it
+_DEFAULT_RNG = np.random.default_rng()
+
+
+def generate_random_fleets(count, rng=None, config=DEFAULT_CONFIG):
+    """
+    Sample count fleets without rejection. Each ship is drawn uniformly from the placements
+    that do not overlap the ships already placed, all count boards at once.
+
+    Overlap is tested against precomputed placement bitmasks with bitwise ands on packed occupancy words.
+    Returns a (count, len(ships)) array of indices into placement_cells(board_size, length) for each ship.
+    """
+    rng = _DEFAULT_RNG if rng is None else np.random.default_rng(rng)
+    board_size, ships = config.board_size, config.ships
+    placements = np.zeros((count, len(ships)), dtype=np.int32)
+
+    if word_count(board_size) > BITMASK_MAX_WORDS:
+        for fleet in placements:
+            _sample_sparse_fleet(fleet, rng, config)
+        return placements
+
+    for start in range(0, count, FLEET_BLOCK_SIZE):
+        block = placements[start:start + FLEET_BLOCK_SIZE]
+        pending = np.arange(len(block))
+
+        # A board can only run out of room with unusually dense fleets. Those boards are simply redrawn
+        while len(pending):
+            occupancy = np.zeros((len(pending), word_count(board_size)), dtype=np.uint64)
+            stuck = np.zeros(len(pending), dtype=bool)
+
+            for ship, length_of_the_ship in enumerate(ships):
+                masks = placement_bits(board_size, length_of_the_ship)
+
+                # One word at a time. Reducing over a short trailing words axis is far slower
+                overlaps = (occupancy[:, None, 0] & masks[None, :, 0]) != 0
+                for word in range(1, masks.shape[1]):
+                    overlaps |= (occupancy[:, None, word] & masks[None, :, word]) != 0
+
+                # Uniform choice among the free placements: the largest random key wins, taken ones never do
+                keys = rng.random(overlaps.shape, dtype=np.float32)
+                keys[overlaps] = -1
+                choice = keys.argmax(axis=1)
+
+                stuck |= overlaps.all(axis=1)
+                occupancy |= masks[choice]
+                block[pending, ship] = choice
+
+            pending = pending[stuck]
+
+    return placements
+
+
+def _sample_sparse_fleet(fleet, rng, config):
+    """
+    Fill one row of generate_random_fleets output on a large board, where ships rarely collide.
+    Same distribution as the bulk path: every ship is uniform over the placements still free.
+    """
+    occupied = np.zeros(config.cell_count, dtype=bool)
+    for ship, length_of_the_ship in enumerate(config.ships):
+        cells, _ = placement_cells(config.board_size, length_of_the_ship)
+
+        for _ in range(REJECTION_ATTEMPTS):
+            choice = rng.integers(len(cells))
+            if not occupied[cells[choice]].any():
+                break
+        else:
+            free = np.flatnonzero(~occupied[cells].any(axis=1))
+            if len(free) == 0:
+                # Out of room, start the board over
+                return _sample_sparse_fleet(fleet, rng, config)
+            choice = free[rng.integers(len(free))]
+
+        occupied[cells[choice]] = True
+        fleet[ship] = choice
+
+
+def fleet_boards(placements, config=DEFAULT_CONFIG, ship_ids=False):
+    """
+    (count, board_size, board_size) boards from generate_random_fleets output, int8 unless there are too many ships.
+    Every ship cell is 1, or the index of its ship plus one if ship_ids is set.
+    """
+    board_size, ships = config.board_size, config.ships
+    dtype = np.int8 if not ship_ids or len(ships) <= np.iinfo(np.int8).max else np.int32
+    boards = np.zeros((len(placements), board_size * board_size), dtype=dtype)
+    rows = np.arange(len(placements))[:, None]
+
+    for ship, length_of_the_ship in enumerate(ships):
+        cells, _ = placement_cells(board_size, length_of_the_ship)
+        boards[rows, cells[placements[:, ship]]] = ship + 1 if ship_ids else 1
+
+    return boards.reshape(len(placements), board_size, board_size)
+
+
+def generate_random_boards(count, rng=None, config=DEFAULT_CONFIG, packed=False):
+    """
+    Bulk version of generateRandomBoard.
+    Returns (count, board_size, board_size) int8 boards, or (count, words) uint64 bitboards if packed.
+    """
+    boards = fleet_boards(generate_random_fleets(count, rng, config), config)
+    if packed:
+        return pack_cells(boards.reshape(count, -1))
+    return boards
+
+
+def fleet_ships(placements, config=DEFAULT_CONFIG):
+    """One fleet from generate_random_fleets output as a list of Bitboards, one per ship."""
+    return [
+        Bitboard.from_cells(placement_cells(config.board_size, length_of_the_ship)[0][placement], config.board_size)
+        for length_of_the_ship, placement in zip(config.ships, placements)
+    ]
+
+
+def find_sunk_ship(ships, hits, row, col):
+    """The ship at (row, col) if every one of its cells has been hit, otherwise None."""
+    for ship in ships:
+        if (row, col) in ship:
+            return ship if not ship - hits else None
+    return None
+
+
+def generateRandomBoard(rng=None, config=DEFAULT_CONFIG):
+    """rng is a numpy Generator or seed. A shared unseeded one is used if not given."""
+    return (generate_random_boards(1, rng, config)[0].astype(int))
+
+
+def possibibleLocationsProbability(board_with_hits, board_with_misses, length_of_the_ship):
+    return (ship_density(board_with_hits, board_with_misses, length_of_the_ship))
+
+
+def generateProbabilitiesForAllShips(board_with_hits, board_with_misses, fleet_state=None, config=DEFAULT_CONFIG):
+    ships = config.ships
+    if fleet_state is not None:
+        if fleet_state.is_defeated():
+            return np.zeros((config.board_size, config.board_size))
+        # Only ships still afloat can be anywhere, and nothing else can sit on a sunk ship
+        ships = fleet_state.remaining
+        board_with_misses = board_with_misses + fleet_state.sunk_cells.to_array(2)
+    return (fleet_density(board_with_hits, board_with_misses, ships))
+
+
+def generateNextMove(board_with_probabilities):
+    return (np.unravel_index(board_with_probabilities.argmax(), board_with_probabilities.shape))
+
+
+class BotGame:
+    """
+    Iterative driver for the probability bot against a known board.
+
+    All state is allocated once up front and updated in place every turn:
+        hits_misses uses the same encoding as the rest of the game. 0 unknown, 1 hit, 2 miss.
+        shots holds the (row, col) of every shot in order. Only the first turn_counter rows are filled.
+
+    If ship_ids is given (fleet_boards with ship_ids set), sinks are announced to the bot.
+    The sunk ships are then removed from its placement search.
+
+    With an opening_book the first shots come from the book until its history runs out or a ship is sunk.
+    The heatmap is only built once it is needed.
+    """
+
+    def __init__(self, opponents_board, config=DEFAULT_CONFIG, max_turns=None, ship_ids=None, opening_book=None):
+        board_size = config.board_size
+
+        self.opponents_board = opponents_board
+        self.ship_ids = ship_ids
+        if ship_ids is not None:
+            # Cells left afloat per ship id. Index 0 is water
+            self.ship_cells_left = np.bincount(ship_ids.ravel(), minlength=len(config.ships) + 1)
+        self.ship_cells = np.count_nonzero(opponents_board == 1)
+        self.max_turns = config.cell_count if max_turns is None else max_turns
+
+        self.config = config
+        # Without a book the heatmap is needed for the first shot, so it is built with the game
+        self._density = None if opening_book is not None else IncrementalDensity(board_size, config.ships)
+        self.opening_book = opening_book
+        # Hit/miss history while the shots still come from the book, None after that
+        self.history = "" if opening_book is not None else None
+
+        self.hits_misses = np.zeros((board_size, board_size), dtype=np.int8)
+        self.shots = np.zeros((self.max_turns, 2), dtype=np.int32)
+
+        self.turn_counter = 0
+        self.successful_hits = 0
+
+    @property
+    def density(self):
+        """The bot's IncrementalDensity, built from the shots so far the first time it is asked for."""
+        if self._density is None:
+            self._density = IncrementalDensity(
+                self.config.board_size, self.config.ships, self.hits_misses == 1, self.hits_misses == 2
+            )
+        return self._density
+
+    @property
+    def probabilities(self):
+        """Heatmap the next shot will be picked from."""
+        return self.density.probabilities
+
+    def is_over(self):
+        return self.successful_hits >= self.ship_cells or self.turn_counter >= self.max_turns
+
+    def step(self):
+        """Fire the next shot. Returns (row, col, is_hit), or None if the game is already over."""
+        if self.is_over():
+            return None
+
+        move = None if self.history is None else self.opening_book.move(self.history)
+        if move is None:
+            self.history = None
+            move = generateNextMove(self.density.probabilities)
+
+        row, col = move
+        is_hit = self.opponents_board[row, col] == 1
+
+        self.hits_misses[row, col] = 1 if is_hit else 2
+        if self.history is not None:
+            self.history += "H" if is_hit else "M"
+        if self._density is not None:
+            self._density.record_shot(row, col, is_hit)
+
+        if is_hit and self.ship_ids is not None:
+            ship_id = self.ship_ids[row, col]
+            self.ship_cells_left[ship_id] -= 1
+            if self.ship_cells_left[ship_id] == 0:
+                # The book does not know about sinks
+                self.history = None
+                cells = np.flatnonzero(self.ship_ids == ship_id)
+                self.density.record_sink(len(cells), cells)
+
+        self.shots[self.turn_counter] = row, col
+        self.turn_counter += 1
+        self.successful_hits += is_hit
+
+        return row, col, is_hit
+
+    def play(self):
+        """Play until every ship cell is hit or the turn limit is reached. Returns the shot sequence."""
+        while self.step() is not None:
+            pass
+        return self.shots[:self.turn_counter]
+
+
+def play_game(opponents_board, ship_ids=None, config=DEFAULT_CONFIG):
+    """
+    Play the probability bot against a board without any display.
+    Returns the number of shots it took, capped at one per cell.
+    The opening comes from the opening book when one was built for the config.
+    """
+    game = BotGame(
+        opponents_board, config, max_turns=config.cell_count, ship_ids=ship_ids, opening_book=opening_book(config)
+    )
+    game.play()
+    return (game.turn_counter)
+
+
+class AIPlayer:
+    """
+    Plays with one of the strategies in STRATEGIES, picked by name.
+
+    Shot results and sinks are queued and only handed to the strategy at the start of the next choose_move.
+    A search the UI gave up on can then keep running on its worker thread without the strategy changing under it.
+    """
+
+    def __init__(self, player_num, strategy="heatmap", config=DEFAULT_CONFIG):
+        placements = generate_random_fleets(1, config=config)[0]
+
+        self.player_num = player_num
+        self.config = config
+        self.board = fleet_boards(placements[None], config)[0].astype(int)
+        self.ships = fleet_ships(placements, config)
+        self.fleet = Bitboard.from_array(self.board)
+        self.strategy = make_strategy(strategy, config)
+        # (method, args) strategy updates not handed over yet
+        self.pending = deque()
+
+    def choose_move(self, shots, time_budget=None):
+        """
+        Pick the next cell to fire at without firing. Safe to run on a worker thread, one call at a time.
+        time_budget caps the seconds spent searching, the best move found by then is returned.
+        """
+        while self.pending:
+            method, args = self.pending.popleft()
+            method(*args)
+        return self.strategy.next_move(time_budget)
+
+    def apply_move(self, opponent_fleet, shots, row, col):
+        """Fire at the cell picked and learn the result, this cell does not have to come from choose_move."""
+        is_hit = (row, col) in opponent_fleet
+        shots.record(row, col, is_hit)
+        self.pending.append((self.strategy.record_shot, (row, col, is_hit)))
+        return row, col
+
+    def make_move(self, opponent_fleet, shots, turn):
+        row, col = self.choose_move(shots)
+        return self.apply_move(opponent_fleet, shots, row, col)
+
+    def record_sink(self, ship):
+        """Told that the ship (a Bitboard) was sunk by our last shot."""
+        self.pending.append((self.strategy.record_sink, (ship,)))
@@ -0,0 +1,138 @@
+"""
+Per turn traces of bot games in one .npz file per run, memory mapped for reading.
+
+A trace holds two arrays:
+    turns, every game's rows back to back. A row holds the heatmap the bot picked its shot from, the hits/misses
+    board at that moment and the shot itself. Each game ends with one more row, with the shot (-1, -1),
+    holding the heatmap and board after its last shot.
+    offsets, the first row of every game and the total row count on the end.
+Games only take the rows they need, so a 10x10 trace holds no padding past the end of short games.
+The .npz is stored uncompressed, so any game or turn can be sliced straight out of the file without reading the rest.
+"""
+import os
+import shutil
+import struct
+import zipfile
+
+import numpy as np
+from numpy.lib import format as npy_format
+
+from config import DEFAULT_CONFIG
+from engine import BotGame
+
+# Fixed length of a zip local file header, before its file name and extra field
+ZIP_LOCAL_HEADER_SIZE = 30
+
+
+def trace_dtype(board_size):
+    return np.dtype([
+        ("probabilities", np.float32, (board_size, board_size)),
+        ("hits_misses", np.int8, (board_size, board_size)),
+        ("shot", np.int16, (2,)),
+    ])
+
+
+class GameTrace:
+    """The turns and offsets of a trace. Index a game with game, nothing else of turns is read."""
+
+    def __init__(self, turns, offsets):
+        self.turns = turns
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def board_size(self):
+        return self.turns.dtype["hits_misses"].shape[0]
+
+    def game(self, game):
+        """The rows of one game, its turns and then the final row."""
+        return self.turns[self.offsets[game]:self.offsets[game + 1]]
+
+    def turn_counts(self):
+        """Number of turns every game in the trace lasted."""
+        return np.diff(self.offsets) - 1
+
+
+class TraceWriter:
+    """
+    Writes a trace from the rows of one game or a chunk of games at a time, as trace_game returns them.
+    Rows go to a temporary file next to path until close. They are copied into the .npz once their count is known.
+    """
+
+    def __init__(self, path, board_size):
+        self.path = path
+        self.dtype = trace_dtype(board_size)
+        self.rows_path = path + ".rows"
+        self.rows_file = open(self.rows_path, "wb")
+        self.offsets = [0]
+
+    def append(self, rows):
+        # Every game ends in the row with no shot
+        ends = np.flatnonzero(rows["shot"][:, 0] < 0) + 1
+        self.offsets.extend(self.offsets[-1] + ends)
+        rows.astype(self.dtype, copy=False).tofile(self.rows_file)
+
+    def close(self):
+        self.rows_file.close()
+        try:
+            offsets = np.array(self.offsets, dtype=np.int64)
+            with zipfile.ZipFile(self.path, "w", zipfile.ZIP_STORED, allowZip64=True) as archive:
+                with archive.open("offsets.npy", "w") as member:
+                    npy_format.write_array(member, offsets)
+                with archive.open("turns.npy", "w", force_zip64=True) as member:
+                    header = {"descr": npy_format.dtype_to_descr(self.dtype), "fortran_order": False,
+                              "shape": (int(offsets[-1]),)}
+                    npy_format.write_array_header_2_0(member, header)
+                    with open(self.rows_path, "rb") as rows_file:
+                        shutil.copyfileobj(rows_file, member)
+        finally:
+            os.remove(self.rows_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_trace(path):
+    """Memory map the trace at path. Only offsets is read up front."""
+    with zipfile.ZipFile(path) as archive:
+        with archive.open("offsets.npy") as member:
+            offsets = npy_format.read_array(member)
+        turns_info = archive.getinfo("turns.npy")
+
+    with open(path, "rb") as file:
+        # The member's data starts after its local header. Its name and extra field lengths can differ from the
+        # ones in the central directory, so they are read from the local header itself
+        file.seek(turns_info.header_offset)
+        local_header = file.read(ZIP_LOCAL_HEADER_SIZE)
+        name_length, extra_length = struct.unpack("<HH", local_header[26:30])
+        file.seek(turns_info.header_offset + ZIP_LOCAL_HEADER_SIZE + name_length + extra_length)
+
+        version = npy_format.read_magic(file)
+        read_header = npy_format.read_array_header_1_0 if version == (1, 0) else npy_format.read_array_header_2_0
+        shape, _, dtype = read_header(file)
+        data_offset = file.tell()
+
+    turns = np.memmap(path, dtype=dtype, mode="r", offset=data_offset, shape=shape) if shape[0] else np.empty(0, dtype)
+    return GameTrace(turns, offsets)
+
+
+def trace_game(opponents_board, ship_ids=None, config=DEFAULT_CONFIG):
+    """Play the bot against a board like play_game and return the game's trace rows."""
+    game = BotGame(opponents_board, config, ship_ids=ship_ids)
+    rows = np.zeros(game.max_turns + 1, dtype=trace_dtype(config.board_size))
+
+    while True:
+        turn = game.turn_counter
+        rows["probabilities"][turn] = game.probabilities
+        rows["hits_misses"][turn] = game.hits_misses
+
+        move = game.step()
+        if move is None:
+            rows["shot"][turn] = -1
+            return rows[:turn + 1]
+        rows["shot"][turn] = move[:2]
@@ -0,0 +1,112 @@
+import numpy as np
+from functools import lru_cache
+
+# Entries in a gradient lookup table. Values are snapped to the nearest entry
+LUT_SIZE = 256
+
+
+def rgb_to_hsv(rgb):
+    """
+    Shamelessly stolen from GeeksForGeeks
+    https://www.geeksforgeeks.org/program-change-rgb-color-model-hsv-color-model/
+    """
+    r, g, b = rgb
+    r, g, b = r / 255.0, g / 255.0, b / 255.0
+
+    cmax = max(r, g, b)
+    cmin = min(r, g, b)
+    diff = cmax - cmin
+
+    if cmax == cmin:
+        h = 0
+    elif cmax == r:
+        h = (60 * ((g - b) / diff) + 360) % 360
+    elif cmax == g:
+        h = (60 * ((b - r) / diff) + 120) % 360
+    elif cmax == b:
+        h = (60 * ((r - g) / diff) + 240) % 360
+    if cmax == 0:
+        s = 0
+    else:
+        s = (diff / cmax) * 100
+
+    v = cmax * 100
+    return h, s, v
+
+
+def hsv_to_rgb(hsv):
+    """
+    Shamelessly stolen from StackOverflow
+    https://stackoverflow.com/questions/24852345/hsv-to-rgb-color-conversion
+    Modified slightly.
+        Expected input values in [0, 1]. I want integer input and output
+    """
+    h, s, v = hsv
+    h /= 360
+    s /= 100
+    v /= 100
+
+    if s == 0.0: result = (v, v, v)
+    i = int(h * 6.)  # XXX assume int() truncates!
+    f = (h * 6.) - i;
+    p, q, t = v * (1. - s), v * (1. - s * f), v * (1. - s * (1. - f));
+    i %= 6
+    if i == 0: result = (v, t, p)
+    if i == 1: result = (q, v, p)
+    if i == 2: result = (p, v, t)
+    if i == 3: result = (p, q, v)
+    if i == 4: result = (t, p, v)
+    if i == 5: result = (v, p, q)
+
+    return tuple(int(result[i] * 255) for i in range(3))
+
+
+def lerp_color_in_rgb(rgb_a, rgb_b, t):
+    return tuple(
+        int(rgb_a[i] * (1 - t) + rgb_b[i] * t)
+        for i in range(3)
+    )
+
+
+def lerp_color_in_hsv(rgb_a, rgb_b, t):
+    hsv_a = rgb_to_hsv(rgb_a)
+    hsv_b = rgb_to_hsv(rgb_b)
+
+    hsv_new = (
+        hsv_a[i] * (1 - t) + hsv_b[i] * t
+        for i in range(3)
+    )
+
+    return hsv_to_rgb(hsv_new)
+
+
+# Lerp function of every color space a gradient can be built in
+COLOR_SPACES = {
+    "rgb": lerp_color_in_rgb,
+    "hsv": lerp_color_in_hsv,
+}
+
+
+@lru_cache(maxsize=None)
+def gradient_lut(rgb_a, rgb_b, color_space="hsv", size=LUT_SIZE):
+    """
+    Read only (size, 3) uint8 table of the gradient from rgb_a to rgb_b, built once per colors and color space.
+    Entry i is the lerp at t = i / (size - 1), so the first and last entries are exactly the end colors.
+    """
+    if color_space not in COLOR_SPACES:
+        raise ValueError(f"Unknown color space {color_space!r}. Expected one of {tuple(COLOR_SPACES)}.")
+
+    lerp = COLOR_SPACES[color_space]
+    lut = np.array([lerp(rgb_a, rgb_b, i / (size - 1)) for i in range(size)], dtype=np.uint8)
+    lut.setflags(write=False)
+    return lut
+
+
+def gradient_colors(t, rgb_a, rgb_b, color_space="hsv", size=LUT_SIZE):
+    """
+    Colors of a whole array of t values in one lookup. Returns t.shape + (3,) uint8 RGB.
+    t is clipped to [0, 1] and snapped to the nearest of the size table entries.
+    """
+    lut = gradient_lut(tuple(rgb_a), tuple(rgb_b), color_space, size)
+    indices = np.rint(np.clip(t, 0, 1) * (size - 1)).astype(np.intp)
+    return lut[indices]
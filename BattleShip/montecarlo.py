@@ -0,0 +1,287 @@
+import time
+
+import numpy as np
+
+from density import IncrementalDensity, placement_cells
+
+# Placements tried per ship at each step of the backtracking search before giving up on that branch
+SEARCH_BRANCHING = 8
+
+# Share of a move's time budget that may go into independent searches for new chains, the rest is for sampling
+SEED_BUDGET_SHARE = 0.5
+
+# Most (chain, placement, placement) combinations a joint redraw of two ships enumerates at once.
+# Chains are redrawn in groups that fit, boards where one chain does not fit skip joint redraws
+PAIR_MOVE_MAX_CELLS = 1 << 22
+
+
+class MonteCarloTargeter:
+    """
+    Targets the cell most likely to hold a ship given every hit and miss seen so far.
+
+    The posterior is sampled with a set of Gibbs chains over complete fleet configurations. Each chain is one
+    placement per ship, with no overlaps, no ship on a miss and every hit covered. A sweep redraws every ship
+    uniformly from the placements that keep its chain consistent, then one random pair of ships jointly from
+    the placement pairs that do. A single ship redraw can never move a hit over to another ship, the pair
+    redraw can, so the chains sample uniformly from the fleets consistent with the observations.
+
+    Chains start from independent randomized searches and are kept between turns. After a shot the chains it
+    contradicts are dropped and replaced by new searches, as far as the time budget allows, otherwise by copies
+    of the survivors. Each move samples until its time budget runs out.
+    If no consistent fleet is found in time it falls back to the placement heatmap.
+    """
+
+    def __init__(self, board_size=10, ships=(5, 4, 3, 3, 2), chains=64, time_budget=0.05, rng=None):
+        self.board_size = board_size
+        self.cell_count = board_size * board_size
+        self.ships = tuple(ships)
+        self.chain_count = chains
+        self.time_budget = time_budget
+        self.rng = np.random.default_rng(rng)
+
+        self.ship_cells = [placement_cells(board_size, length)[0] for length in self.ships]
+
+        self.hit_cells = np.zeros(self.cell_count, dtype=bool)
+        self.miss_cells = np.zeros(self.cell_count, dtype=bool)
+        self.allowed = [np.ones(len(cells), dtype=bool) for cells in self.ship_cells]
+
+        # (chains, ships) placement index of every ship in every chain. Only consistent chains are kept,
+        # posterior tops them back up to chain_count
+        self.chains = np.zeros((0, len(self.ships)), dtype=np.int64)
+        # (placements, placements) overlaps between the placements of two ship lengths, see _overlaps
+        self.overlaps = dict()
+
+        self.fallback = IncrementalDensity(board_size, self.ships)
+
+    def record_shot(self, row, col, is_hit):
+        cell = row * self.board_size + col
+        if is_hit:
+            self.hit_cells[cell] = True
+        else:
+            self.miss_cells[cell] = True
+            for ship, cells in enumerate(self.ship_cells):
+                self.allowed[ship] &= ~(cells == cell).any(axis=1)
+
+        self.fallback.record_shot(row, col, is_hit)
+
+        # Copies of one chain only count once, the rest are replaced by new searches in posterior
+        self.chains = np.unique(self.chains[self._consistent(self.chains)], axis=0)
+
+    def record_sink(self, length_of_the_ship, cells):
+        """Drop one ship of that length from the sampled fleets. Its flat cells become blocked like misses."""
+        columns = [ship for ship, length in enumerate(self.ships) if length == length_of_the_ship]
+        if not columns:
+            raise ValueError(f"No {length_of_the_ship} long ship left to sink.")
+        drop = columns[0]
+
+        table = self.ship_cells[drop]
+        sunk_index = np.nonzero((table == np.sort(cells)).all(axis=1))[0][0]
+
+        # Chains that put a ship of that length exactly on the sunk cells are still consistent.
+        # Move that ship into the dropped column, equal lengths share a table, and keep the rest
+        on_sunk = self.chains[:, columns] == sunk_index
+        survivors = on_sunk.any(axis=1)
+        rows = np.arange(len(self.chains))
+        matching = np.array(columns)[on_sunk.argmax(axis=1)]
+        self.chains[rows, matching] = self.chains[rows, drop]
+        self.chains[rows, drop] = sunk_index
+        self.chains = np.unique(np.delete(self.chains, drop, axis=1)[survivors], axis=0)
+
+        self.ships = self.ships[:drop] + self.ships[drop + 1:]
+        del self.ship_cells[drop]
+        del self.allowed[drop]
+
+        self.hit_cells[cells] = False
+        self.miss_cells[cells] = True
+        for ship, ship_cells in enumerate(self.ship_cells):
+            self.allowed[ship] &= ~np.isin(ship_cells, cells).any(axis=1)
+
+        self.fallback.record_sink(length_of_the_ship, cells)
+
+    def _occupancy(self, chains, skip=()):
+        """(chains, cell_count) cells covered by every ship of each chain, except the ones being redrawn."""
+        occupied = np.zeros((len(chains), self.cell_count), dtype=bool)
+        rows = np.arange(len(chains))[:, None]
+        for ship, cells in enumerate(self.ship_cells):
+            if ship not in skip:
+                occupied[rows, cells[chains[:, ship]]] = True
+        return occupied
+
+    def _consistent(self, chains):
+        occupied = self._occupancy(chains)
+        covers_hits = ~(self.hit_cells & ~occupied).any(axis=1)
+        avoids_misses = np.ones(len(chains), dtype=bool)
+        for ship in range(len(self.ships)):
+            avoids_misses &= self.allowed[ship][chains[:, ship]]
+        return covers_hits & avoids_misses
+
+    def _gibbs_sweep(self):
+        """
+        Redraw every ship of every chain once, conditioned on the rest of its chain.
+        Then, if there are hits, redraw one random pair of ships jointly.
+        """
+        for ship, cells in enumerate(self.ship_cells):
+            occupied = self._occupancy(self.chains, skip=(ship,))
+            uncovered_hits = self.hit_cells & ~occupied
+
+            # A placement has to avoid the other ships and cover every hit they leave uncovered
+            candidate_cells_occupied = occupied[:, cells]
+            candidate_hits = uncovered_hits[:, cells].sum(axis=2)
+            valid = (
+                self.allowed[ship]
+                & ~candidate_cells_occupied.any(axis=2)
+                & (candidate_hits == uncovered_hits.sum(axis=1)[:, None])
+            )
+
+            keys = self.rng.random(valid.shape, dtype=np.float32)
+            keys[~valid] = -1
+            self.chains[:, ship] = keys.argmax(axis=1)
+
+        # Without hits every ship can move anywhere free on its own
+        if len(self.ships) >= 2 and self.hit_cells.any():
+            first, second = self.rng.choice(len(self.ships), size=2, replace=False)
+            self._pair_move(first, second)
+
+    def _overlaps(self, first, second):
+        """(placements, placements) whether a placement of the first ship shares a cell with one of the second."""
+        key = self.ships[first], self.ships[second]
+        if key not in self.overlaps:
+            masks = []
+            for cells in self.ship_cells[first], self.ship_cells[second]:
+                mask = np.zeros((len(cells), self.cell_count), dtype=np.float32)
+                mask[np.arange(len(cells))[:, None], cells] = 1
+                masks.append(mask)
+            self.overlaps[key] = masks[0] @ masks[1].T > 0
+        return self.overlaps[key]
+
+    def _pair_move(self, first, second):
+        """
+        Redraw two ships of every chain jointly, uniformly from the placement pairs that keep the chain consistent.
+        This is what lets the ship covering a hit change, one ship at a time the hit pins it in place.
+        """
+        cells_first, cells_second = self.ship_cells[first], self.ship_cells[second]
+        overlaps = self._overlaps(first, second)
+        group = PAIR_MOVE_MAX_CELLS // overlaps.size
+        if group == 0:
+            return
+
+        for start in range(0, len(self.chains), group):
+            chains = self.chains[start:start + group]
+            occupied = self._occupancy(chains, skip=(first, second))
+            uncovered_hits = self.hit_cells & ~occupied
+
+            # The pair has to avoid the other ships and each other, and cover every hit the others leave uncovered
+            valid_first = self.allowed[first] & ~occupied[:, cells_first].any(axis=2)
+            valid_second = self.allowed[second] & ~occupied[:, cells_second].any(axis=2)
+            hits_first = uncovered_hits[:, cells_first].sum(axis=2)
+            hits_second = uncovered_hits[:, cells_second].sum(axis=2)
+            valid = (
+                valid_first[:, :, None] & valid_second[:, None, :] & ~overlaps
+                & (hits_first[:, :, None] + hits_second[:, None, :] == uncovered_hits.sum(axis=1)[:, None, None])
+            ).reshape(len(chains), -1)
+
+            # The chain's current pair is always valid, so every row has a choice
+            keys = self.rng.random(valid.shape, dtype=np.float32)
+            keys[~valid] = -1
+            self.chains[start:start + group, first], self.chains[start:start + group, second] = np.divmod(
+                keys.argmax(axis=1), len(cells_second)
+            )
+
+    def _find_consistent_fleet(self, deadline):
+        """
+        Randomized backtracking search for one consistent fleet: cover the hits first, then place the rest.
+        Returns a placement index per ship, or None if the deadline passes first.
+        """
+        ship_order = np.argsort(self.ships)[::-1]
+        placement = [-1] * len(self.ships)
+        occupied = np.zeros(self.cell_count, dtype=bool)
+
+        def candidates(ship, must_cover):
+            cells = self.ship_cells[ship]
+            valid = self.allowed[ship] & ~occupied[cells].any(axis=1)
+            if must_cover is not None:
+                valid &= (cells == must_cover).any(axis=1)
+            return self.rng.permutation(np.nonzero(valid)[0])
+
+        def place(ship, index, value):
+            occupied[self.ship_cells[ship][index]] = value
+            placement[ship] = index if value else -1
+
+        def search():
+            if time.perf_counter() > deadline:
+                return False
+
+            uncovered = np.nonzero(self.hit_cells & ~occupied)[0]
+            unplaced = [ship for ship in ship_order if placement[ship] == -1]
+            if not unplaced:
+                return len(uncovered) == 0
+
+            if len(uncovered):
+                # Some unplaced ship has to cover the first uncovered hit
+                ships_to_try = self.rng.permutation(unplaced)
+                must_cover = uncovered[0]
+            else:
+                ships_to_try = unplaced[:1]
+                must_cover = None
+
+            for ship in ships_to_try:
+                for index in candidates(ship, must_cover)[:SEARCH_BRANCHING]:
+                    place(ship, index, True)
+                    if search():
+                        return True
+                    place(ship, index, False)
+            return False
+
+        if search():
+            return np.array(placement, dtype=np.int64)
+        return None
+
+    def posterior(self, time_budget=None):
+        """
+        Sample until the time budget runs out.
+        Returns ((board_size, board_size) probability each cell holds a ship, number of samples).
+        """
+        time_budget = self.time_budget if time_budget is None else time_budget
+        start = time.perf_counter()
+        deadline = start + time_budget
+
+        self._seed_chains(start + time_budget * SEED_BUDGET_SHARE)
+        if len(self.chains) == 0:
+            return np.zeros((self.board_size, self.board_size)), 0
+
+        counts = np.zeros(self.cell_count)
+        samples = 0
+        while samples == 0 or time.perf_counter() < deadline:
+            self._gibbs_sweep()
+            counts += self._occupancy(self.chains).sum(axis=0)
+            samples += self.chain_count
+
+        return (counts / samples).reshape(self.board_size, self.board_size), samples
+
+    def _seed_chains(self, deadline):
+        """
+        Top the chains back up to chain_count with independent searches until the deadline,
+        then with copies of the chains there are. The sweeps spread copies back out.
+        """
+        fleets = [self.chains]
+        found = len(self.chains)
+        while found < self.chain_count:
+            fleet = self._find_consistent_fleet(deadline)
+            if fleet is None:
+                break
+            fleets.append(fleet[None])
+            found += 1
+        self.chains = np.concatenate(fleets)
+
+        if 0 < len(self.chains) < self.chain_count:
+            copies = self.rng.integers(len(self.chains), size=self.chain_count - len(self.chains))
+            self.chains = np.concatenate((self.chains, self.chains[copies]))
+
+    def next_move(self, time_budget=None):
+        probabilities, samples = self.posterior(time_budget)
+        if samples == 0:
+            probabilities = self.fallback.probabilities.copy()
+
+        # Never fire at a cell twice
+        probabilities = np.where((self.hit_cells | self.miss_cells).reshape(probabilities.shape), -1, probabilities)
+        return np.unravel_index(probabilities.argmax(), probabilities.shape)
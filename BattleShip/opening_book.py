@@ -0,0 +1,166 @@
+"""
+Opening book for the probability bot.
+
+Until it sinks a ship the bot is deterministic: its next shot only depends on which of its earlier shots hit.
+The book stores that shot for every hit/miss history up to some depth, keyed by strings like "HMM"
+(hit, then two misses), so the first turns of a game need no heatmap at all.
+    python opening_book.py build --depth 12
+    python opening_book.py show --depth 3
+
+Books are built offline and saved as .npz with the board size and fleet they were built for, and a fingerprint
+of the heatmap that picked the moves. The default book is loaded the first time it is asked for, and only used
+for that same configuration while the engine still produces the same fingerprint.
+"""
+import argparse
+import hashlib
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from config import DEFAULT_CONFIG, GameConfig
+from density import IncrementalDensity
+
+LOCAL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Where the book is built to and loaded from unless another path is given
+OPENING_BOOK_PATH = os.path.join(LOCAL_DIR, "opening_book.npz")
+
+# Turns covered by a default build. The book holds up to 2 ** (depth + 1) - 1 moves
+DEFAULT_DEPTH = 12
+
+HIT = "H"
+MISS = "M"
+
+# (row, col, is_hit) shots engine_fingerprint replays, relative to the board center. Hits in both directions
+# and a miss touch every part of the placement weighting
+FINGERPRINT_SHOTS = ((0, 0, True), (0, 1, True), (1, 0, False), (-1, -1, False))
+
+
+class OpeningBook:
+    """The bot's shot for every hit/miss history of up to depth turns, for one board size and fleet."""
+
+    def __init__(self, moves, config=DEFAULT_CONFIG, depth=DEFAULT_DEPTH, fingerprint=None):
+        self.moves = moves
+        self.config = config
+        self.depth = depth
+        self.fingerprint = engine_fingerprint(config) if fingerprint is None else fingerprint
+
+    def move(self, history):
+        """The (row, col) to fire at after the history, or None if the book does not cover it."""
+        return self.moves.get(history)
+
+    def save(self, path=OPENING_BOOK_PATH):
+        histories = sorted(self.moves, key=lambda history: (len(history), history))
+        np.savez_compressed(
+            path,
+            histories=np.array(histories),
+            moves=np.array([self.moves[history] for history in histories], dtype=np.int16).reshape(-1, 2),
+            board_size=self.config.board_size,
+            ships=np.array(self.config.ships),
+            depth=self.depth,
+            fingerprint=self.fingerprint,
+        )
+
+    @classmethod
+    def load(cls, path=OPENING_BOOK_PATH):
+        with np.load(path) as data:
+            config = GameConfig(int(data["board_size"]), tuple(int(length) for length in data["ships"]))
+            moves = {str(history): (int(row), int(col)) for history, (row, col) in zip(data["histories"], data["moves"])}
+            # Books from before fingerprints were stored never match
+            fingerprint = str(data["fingerprint"]) if "fingerprint" in data else ""
+            return cls(moves, config, int(data["depth"]), fingerprint)
+
+
+def engine_fingerprint(config=DEFAULT_CONFIG):
+    """
+    Hash of the heatmaps the bot sees over a few fixed shots. Any change to the density weighting changes it,
+    so a book built with an older engine is not used to open games the current one would open differently.
+    """
+    board_size = config.board_size
+    center = board_size // 2
+
+    density = IncrementalDensity(board_size, config.ships)
+    digest = hashlib.sha256(density.probabilities.tobytes())
+    for row, col, is_hit in FINGERPRINT_SHOTS:
+        density.record_shot((center + row) % board_size, (center + col) % board_size, is_hit)
+        digest.update(density.probabilities.tobytes())
+    return digest.hexdigest()
+
+
+def build_opening_book(depth=DEFAULT_DEPTH, config=DEFAULT_CONFIG):
+    """
+    Play out every hit/miss history of up to depth turns with the bot's heatmap and keep its shot after each.
+    Histories no fleet is consistent with are left out.
+    """
+    moves = dict()
+    histories = [""]
+    while histories:
+        history = histories.pop()
+
+        # Replayed from the start, every history is a handful of cheap incremental updates
+        density = IncrementalDensity(config.board_size, config.ships)
+        for (row, col), result in zip((moves[history[:turn]] for turn in range(len(history))), history):
+            density.record_shot(row, col, result == HIT)
+
+        probabilities = density.probabilities
+        if probabilities.max() <= 0 or history.count(HIT) >= config.ship_cell_count:
+            continue
+
+        row, col = np.unravel_index(probabilities.argmax(), probabilities.shape)
+        moves[history] = int(row), int(col)
+        if len(history) < depth:
+            histories += [history + MISS, history + HIT]
+
+    return OpeningBook(moves, config, depth)
+
+
+@lru_cache(maxsize=None)
+def opening_book(config=DEFAULT_CONFIG, path=OPENING_BOOK_PATH):
+    """
+    The book at path if it was built for this configuration by an engine with the current fingerprint,
+    otherwise None. Read from disk once.
+    """
+    if not os.path.exists(path):
+        return None
+    book = OpeningBook.load(path)
+    if book.config != config or book.fingerprint != engine_fingerprint(config):
+        return None
+    return book
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or inspect the probability bot's opening book.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="build a book and save it")
+    build.add_argument("--path", default=OPENING_BOOK_PATH)
+    build.add_argument("--depth", type=int, default=DEFAULT_DEPTH)
+    build.add_argument("--board-size", type=int, default=DEFAULT_CONFIG.board_size)
+    build.add_argument("--ships", type=int, nargs="+", default=None,
+                       help="ship lengths, defaults to one classic fleet per 10 cells of board width")
+
+    show = subparsers.add_parser("show", help="print the moves of a saved book")
+    show.add_argument("--path", default=OPENING_BOOK_PATH)
+    show.add_argument("--depth", type=int, default=None, help="only print histories up to this long")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        try:
+            config = GameConfig.scaled(args.board_size) if args.ships is None else GameConfig(args.board_size, args.ships)
+        except ValueError as error:
+            build.error(str(error))
+        book = build_opening_book(args.depth, config)
+        book.save(args.path)
+        print(f"Wrote {len(book.moves)} moves for {config} to {args.path}")
+    else:
+        book = OpeningBook.load(args.path)
+        print(f"{book.config}, depth {book.depth}, {len(book.moves)} moves")
+        for history in sorted(book.moves, key=lambda history: (len(history), history)):
+            if args.depth is None or len(history) <= args.depth:
+                print(f"{history or '-':>{book.depth}s} {book.moves[history]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""
+Record a bot game's heatmap at every turn, then replay or export it without running the engine again.
+    python replay.py record game.npz --seed 0
+    python replay.py play game.npz --fps 4
+    python replay.py export game.npz --gif game.gif --fps 4
+    python replay.py export game.npz --png frames
+    python replay.py play games.npz --game 7
+
+Games kept in a simulate.py --trace file are played and exported with --game, its index in the trace.
+
+Exporting works offscreen. GIFs need Pillow, PNGs use Pillow if it is installed and pygame otherwise.
+"""
+import argparse
+import os
+
+import numpy as np
+
+from config import DEFAULT_CONFIG, GameConfig
+from engine import BotGame, fleet_boards, generate_random_fleets
+from game_trace import open_trace
+from gradient import gradient_colors
+
+# Exported frames show the hits/misses board and the heatmap side by side, this many pixels apart
+PANEL_GAP = 2
+
+FRAME_BACKGROUND = (150, 150, 150)
+FRAME_GRID = (50, 50, 50)
+FRAME_COLOR_A = (255, 0, 0)
+FRAME_COLOR_B = (0, 255, 0)
+
+
+class GameRecording:
+    """
+    One game of the bot, turn by turn.
+        board is the opponent's (board_size, board_size) board, 1 on ship cells.
+        shots holds the (row, col) of every shot in order and hits whether each one hit.
+        heatmaps holds the bot's heatmap after each number of shots, so it has one more entry than shots.
+    """
+
+    def __init__(self, board, shots, hits, heatmaps):
+        self.board = board
+        self.shots = shots
+        self.hits = hits
+        self.heatmaps = heatmaps
+
+    @property
+    def board_size(self):
+        return self.board.shape[0]
+
+    @property
+    def turn_count(self):
+        return len(self.shots)
+
+    def hits_misses(self, turn):
+        """The display's hits/misses board after the first turn shots. 0 unknown, 1 hit, 2 miss."""
+        board = np.zeros((self.board_size, self.board_size), dtype=np.int8)
+        rows, cols = self.shots[:turn].T
+        board[rows, cols] = np.where(self.hits[:turn], 1, 2)
+        return board
+
+    def save(self, path):
+        np.savez_compressed(path, board=self.board, shots=self.shots, hits=self.hits, heatmaps=self.heatmaps)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["board"], data["shots"], data["hits"], data["heatmaps"])
+
+    @classmethod
+    def from_trace(cls, trace, game):
+        """
+        One game out of a game_trace.GameTrace. Only that game's rows are read.
+        Traced games are played to the end, so the board is the hit cells of the final row.
+        """
+        rows = trace.game(game)
+        shots = rows["shot"][:-1].astype(np.int16)
+        final_hits_misses = np.array(rows["hits_misses"][-1])
+        hits = final_hits_misses[shots[:, 0], shots[:, 1]] == 1
+        return cls((final_hits_misses == 1).astype(np.int8), shots, hits, np.array(rows["probabilities"]))
+
+
+def record_game(opponents_board, ship_ids=None, config=DEFAULT_CONFIG):
+    """Play the bot against a board and record its heatmap before every shot."""
+    game = BotGame(opponents_board, config, ship_ids=ship_ids)
+
+    heatmaps = np.zeros((game.max_turns + 1, config.board_size, config.board_size), dtype=np.float32)
+    hits = np.zeros(game.max_turns, dtype=bool)
+
+    heatmaps[0] = game.probabilities
+    while (move := game.step()) is not None:
+        hits[game.turn_counter - 1] = move[2]
+        heatmaps[game.turn_counter] = game.probabilities
+
+    turns = game.turn_counter
+    return GameRecording(
+        (opponents_board != 0).astype(np.int8),
+        game.shots[:turns].astype(np.int16),
+        hits[:turns],
+        heatmaps[:turns + 1]
+    )
+
+
+def record_random_game(seed=None, config=DEFAULT_CONFIG):
+    ship_ids = fleet_boards(generate_random_fleets(1, np.random.default_rng(seed), config), config, ship_ids=True)[0]
+    return record_game(ship_ids != 0, ship_ids, config)
+
+
+def panel_colors(recording, turn):
+    """(board_size, board_size, 3) colors of the hits/misses board and of the heatmap at a turn, like display_plot."""
+    hits_misses = recording.hits_misses(turn)
+    hits_misses_colors = gradient_colors(np.array((.5, 1, 0))[hits_misses], FRAME_COLOR_A, FRAME_COLOR_B)
+
+    heatmap = recording.heatmaps[turn]
+    span = heatmap.max() - heatmap.min()
+    t = np.full(heatmap.shape, .5) if span == 0 else (heatmap - heatmap.min()) / span
+    heatmap_colors = gradient_colors(t, FRAME_COLOR_A, FRAME_COLOR_B)
+
+    return hits_misses_colors, heatmap_colors
+
+
+def render_frame(recording, turn, tile=20):
+    """One (height, width, 3) uint8 image of a turn, drawn with numpy only so no display is needed."""
+    def upscale(colors):
+        image = np.repeat(np.repeat(colors, tile, axis=0), tile, axis=1)
+        if tile >= 5:
+            # Tile borders, 1 pixel on each side of every tile
+            image[::tile] = image[tile - 1::tile] = FRAME_GRID
+            image[:, ::tile] = image[:, tile - 1::tile] = FRAME_GRID
+        return image
+
+    left, right = (upscale(colors) for colors in panel_colors(recording, turn))
+    gap = np.empty((left.shape[0], PANEL_GAP, 3), dtype=np.uint8)
+    gap[:] = FRAME_BACKGROUND
+    return np.concatenate((left, gap, right), axis=1)
+
+
+def _import_pillow():
+    try:
+        from PIL import Image
+    except ImportError as error:
+        raise ImportError("Exporting GIFs needs Pillow: pip install pillow") from error
+    return Image
+
+
+def export_png(recording, directory, tile=20):
+    """Write every turn as directory/turn_NNN.png. Returns the paths written."""
+    os.makedirs(directory, exist_ok=True)
+
+    try:
+        Image = _import_pillow()
+    except ImportError:
+        Image = None
+
+    paths = []
+    for turn in range(recording.turn_count + 1):
+        frame = render_frame(recording, turn, tile)
+        path = os.path.join(directory, f"turn_{turn:03d}.png")
+        if Image is not None:
+            Image.fromarray(frame).save(path)
+        else:
+            import pygame
+            pygame.image.save(pygame.surfarray.make_surface(frame.swapaxes(0, 1)), path)
+        paths.append(path)
+    return paths
+
+
+def export_gif(recording, path, fps=4, tile=20):
+    """Write the whole game as one looping animated GIF."""
+    Image = _import_pillow()
+
+    frames = [Image.fromarray(render_frame(recording, turn, tile)) for turn in range(recording.turn_count + 1)]
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=round(1000 / fps), loop=0)
+
+
+def load_recording(path, game=None):
+    """The GameRecording saved at path, or game number game of the trace at path."""
+    if game is None:
+        return GameRecording.load(path)
+
+    trace = open_trace(path)
+    if not 0 <= game < len(trace):
+        raise IndexError(f"The trace has {len(trace)} games, there is no game {game}.")
+    return GameRecording.from_trace(trace, game)
+
+
+def play_recording(recording, fps=4):
+    """Replay a recording in the game window, fps turns a second."""
+    # The viewer is the only part that needs a display
+    from display import ReplayScene, run_scene
+
+    run_scene(ReplayScene(recording, fps))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record, replay and export bot games.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record = subparsers.add_parser("record", help="play one game on a random board and save it")
+    record.add_argument("path")
+    record.add_argument("--seed", type=int, default=None)
+    record.add_argument("--board-size", type=int, default=DEFAULT_CONFIG.board_size)
+
+    play = subparsers.add_parser("play", help="replay a recorded game in a window")
+    play.add_argument("path")
+    play.add_argument("--fps", type=float, default=4)
+    play.add_argument("--game", type=int, default=None, help="play this game of a simulate.py --trace file")
+
+    export = subparsers.add_parser("export", help="write a recorded game as PNG frames or an animated GIF")
+    export.add_argument("path")
+    export.add_argument("--png", metavar="DIRECTORY")
+    export.add_argument("--gif", metavar="PATH")
+    export.add_argument("--fps", type=float, default=4)
+    export.add_argument("--tile", type=int, default=20, help="pixels per tile")
+    export.add_argument("--game", type=int, default=None, help="export this game of a simulate.py --trace file")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        try:
+            config = GameConfig.scaled(args.board_size)
+        except ValueError as error:
+            record.error(str(error))
+        recording = record_random_game(args.seed, config)
+        recording.save(args.path)
+        print(f"Recorded {recording.turn_count} turns to {args.path}")
+    elif args.command == "play":
+        try:
+            recording = load_recording(args.path, args.game)
+        except IndexError as error:
+            play.error(str(error))
+        play_recording(recording, args.fps)
+    else:
+        if args.png is None and args.gif is None:
+            parser.error("export needs --png and/or --gif")
+        try:
+            recording = load_recording(args.path, args.game)
+        except IndexError as error:
+            export.error(str(error))
+        if args.png is not None:
+            print(f"Wrote {len(export_png(recording, args.png, args.tile))} frames to {args.png}")
+        if args.gif is not None:
+            export_gif(recording, args.gif, args.fps, args.tile)
+            print(f"Wrote {args.gif}")
+
+
+if __name__ == '__main__':
+    main()
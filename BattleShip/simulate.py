@@ -0,0 +1,158 @@
+"""
+Headless batch runner for the probability bot.
+
+Plays many games against random boards across a process pool and reports how many turns it took to win.
+    python simulate.py --games 100000 --workers 8 --seed 0
+    python simulate.py --games 10000 --seed 0 --trace games.npz
+"""
+import argparse
+import multiprocessing
+
+import numpy as np
+
+from config import CLASSIC_FLEET, DEFAULT_CONFIG, GameConfig
+from engine import fleet_boards, generate_random_fleets, play_game
+from game_trace import TraceWriter, trace_dtype, trace_game
+
+
+def play_chunk(seed, games, config=DEFAULT_CONFIG, trace=False):
+    """
+    Play a chunk of games with its own seeded RNG.
+    Returns a histogram of turns to win so workers only send back one count per possible turn.
+    With trace set it returns (histogram, the trace rows of every game in order) instead, see game_trace.
+    """
+    histogram = np.zeros(config.cell_count + 1, dtype=np.int64)
+    rows = []
+
+    fleets = generate_random_fleets(games, np.random.default_rng(seed), config)
+    for ship_ids in fleet_boards(fleets, config, ship_ids=True):
+        if trace:
+            rows.append(trace_game(ship_ids != 0, ship_ids, config))
+            turns = len(rows[-1]) - 1
+        else:
+            turns = play_game(ship_ids != 0, ship_ids, config)
+        histogram[turns] += 1
+
+    if trace:
+        return histogram, np.concatenate(rows) if rows else np.zeros(0, trace_dtype(config.board_size))
+    return histogram
+
+
+def _play_chunk_star(args):
+    return play_chunk(*args)
+
+
+def chunk_jobs(games, chunk_size, seed):
+    """
+    Split the games into chunks, each with a seed spawned from the base seed.
+    The results only depend on the seed and chunk size, not on the number of workers.
+    Returns a (seed, games, first game) tuple per chunk.
+    """
+    chunk_count = -(-games // chunk_size)
+    children = np.random.SeedSequence(seed).spawn(chunk_count)
+
+    jobs = []
+    for i, child in enumerate(children):
+        chunk_games = min(chunk_size, games - i * chunk_size)
+        jobs.append((int(child.generate_state(1)[0]), chunk_games, i * chunk_size))
+    return jobs
+
+
+def simulate(games, workers=None, chunk_size=1000, seed=None, config=DEFAULT_CONFIG, trace_path=None):
+    """
+    Play the games across a pool of workers and return the combined turns to win histogram.
+    With a trace_path every turn of every game is kept in that trace file, see game_trace.
+    """
+    trace = trace_path is not None
+    jobs = [
+        (chunk_seed, chunk_games, config, trace)
+        for chunk_seed, chunk_games, _ in chunk_jobs(games, chunk_size, seed)
+    ]
+
+    if workers == 1:
+        return collect_chunks(map(_play_chunk_star, jobs), config, trace_path)
+
+    with multiprocessing.Pool(workers) as pool:
+        # In order when tracing, so the games land in the trace in order
+        results = pool.imap(_play_chunk_star, jobs) if trace else pool.imap_unordered(_play_chunk_star, jobs)
+        return collect_chunks(results, config, trace_path)
+
+
+def collect_chunks(results, config=DEFAULT_CONFIG, trace_path=None):
+    """Add up the play_chunk results into one histogram, writing their trace rows to trace_path if it is given."""
+    histogram = np.zeros(config.cell_count + 1, dtype=np.int64)
+
+    if trace_path is None:
+        for chunk_histogram in results:
+            histogram += chunk_histogram
+        return histogram
+
+    with TraceWriter(trace_path, config.board_size) as writer:
+        for chunk_histogram, rows in results:
+            histogram += chunk_histogram
+            writer.append(rows)
+    return histogram
+
+
+def percentile(histogram, q):
+    """Nearest rank percentile of the turn counts described by the histogram."""
+    cumulative = np.cumsum(histogram)
+    rank = max(1, int(np.ceil(q / 100 * cumulative[-1])))
+    return int(np.searchsorted(cumulative, rank))
+
+
+def summarize(histogram, percentiles=(5, 25, 75, 95)):
+    turns = np.arange(len(histogram))
+    games = histogram.sum()
+
+    lines = [
+        f"Games: {games}",
+        f"Mean turns: {(turns * histogram).sum() / games:.3f}",
+        f"Median turns: {percentile(histogram, 50)}",
+    ]
+    for q in percentiles:
+        lines.append(f"P{q:g} turns: {percentile(histogram, q)}")
+
+    lines.append("Histogram:")
+    bar_scale = 50 / histogram.max()
+    for turn in np.nonzero(histogram)[0]:
+        count = histogram[turn]
+        lines.append(f"{turn:4d} {count:10d} {'#' * max(1, round(count * bar_scale))}")
+
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play the probability bot headless and report turns to win.")
+    parser.add_argument("--games", type=int, default=1000, help="number of games to play")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to the core count")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="games per task handed to a worker")
+    parser.add_argument("--seed", type=int, default=None, help="base seed, random if not given")
+    parser.add_argument("--percentiles", type=float, nargs="*", default=[5, 25, 75, 95])
+    parser.add_argument("--board-size", type=int, default=DEFAULT_CONFIG.board_size)
+    parser.add_argument("--ships", type=int, nargs="+", default=None,
+                        help="ship lengths, defaults to one classic fleet per 10 cells of board width")
+    parser.add_argument("--trace", default=None, metavar="PATH", help="keep every turn of every game in a .npz trace")
+    args = parser.parse_args()
+
+    if args.games < 1:
+        parser.error("--games has to be at least 1")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size has to be at least 1")
+    if any(not 0 <= q <= 100 for q in args.percentiles):
+        parser.error("--percentiles have to be between 0 and 100")
+
+    try:
+        if args.ships is None:
+            config = GameConfig.scaled(args.board_size, CLASSIC_FLEET)
+        else:
+            config = GameConfig(args.board_size, args.ships)
+    except ValueError as error:
+        parser.error(str(error))
+
+    histogram = simulate(args.games, args.workers, args.chunk_size, args.seed, config, args.trace)
+    print(summarize(histogram, args.percentiles))
+
+
+if __name__ == '__main__':
+    main()
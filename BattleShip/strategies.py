@@ -0,0 +1,205 @@
+"""
+Targeting strategies for the AI players. Every strategy sees only what a player could: the result of its own
+shots and which ships it sank. Add a strategy to STRATEGIES to make it selectable in the game and the tournament.
+"""
+import numpy as np
+
+from bitboard import Bitboard, FleetState
+from config import DEFAULT_CONFIG
+from density import IncrementalDensity, parity_masks
+from montecarlo import MonteCarloTargeter
+
+
+class Strategy:
+    """
+    Picks the shots of one player for one game.
+
+    The player reports the result of every shot with record_shot and every ship it sank with record_sink,
+    and asks for its next shot with next_move. The observed state is kept in:
+        hits_misses, (board_size, board_size) in the usual encoding. 0 unknown, 1 hit, 2 miss.
+        fleet_state, the FleetState of the opponent's fleet. remaining and sunk read from it.
+    Subclasses implement next_move and extend the record methods to keep their own state up to date.
+    """
+
+    # Shown on the player selection button
+    label = None
+
+    def __init__(self, config=DEFAULT_CONFIG, rng=None):
+        board_size = config.board_size
+
+        self.config = config
+        self.rng = np.random.default_rng(rng)
+        self.hits_misses = np.zeros((board_size, board_size), dtype=np.int8)
+        self.fleet_state = FleetState(config)
+
+    @property
+    def remaining(self):
+        """Lengths of the ships still afloat."""
+        return self.fleet_state.remaining
+
+    @property
+    def sunk(self):
+        """(board_size, board_size) cells of the ships already sunk."""
+        return self.fleet_state.sunk_cells.to_array(dtype=bool)
+
+    def next_move(self, time_budget=None):
+        """The (row, col) to fire at next. time_budget caps the seconds spent on it for strategies that search."""
+        raise NotImplementedError
+
+    def record_shot(self, row, col, is_hit):
+        self.hits_misses[row, col] = 1 if is_hit else 2
+
+    def record_sink(self, ship):
+        """Told that the ship (a Bitboard) was sunk by our last shot."""
+        self.fleet_state.record_sink(ship)
+
+    def _random_cell(self, candidates):
+        """A uniformly random (row, col) out of a (board_size, board_size) boolean mask."""
+        rows, cols = np.nonzero(candidates)
+        pick = self.rng.integers(len(rows))
+        return rows[pick], cols[pick]
+
+
+class RandomStrategy(Strategy):
+    """Fires at a random cell it has not fired at yet. The baseline every other strategy should beat."""
+
+    label = "AI (random)"
+
+    def next_move(self, time_budget=None):
+        return self._random_cell(self.hits_misses == 0)
+
+
+class ParityStrategy(Strategy):
+    """
+    Classic hunt and target.
+    While every hit belongs to a sunk ship it hunts at random on the parity lattice of the smallest ship
+    afloat, the cells with (row + col) divisible by its length, which no ship can avoid.
+    Otherwise it targets the unknown cells next to the unresolved hits, preferring cells that extend a line of hits.
+    """
+
+    label = "AI (parity)"
+
+    def next_move(self, time_budget=None):
+        unknown = self.hits_misses == 0
+        unresolved = Bitboard.from_array(self.hits_misses, 1) - self.fleet_state.sunk_cells
+
+        if unresolved:
+            # Cells right past either end of two unresolved hits in a row
+            lines = unknown & (
+                unresolved.shift(1, 0) & unresolved.shift(2, 0)
+                | unresolved.shift(-1, 0) & unresolved.shift(-2, 0)
+                | unresolved.shift(0, 1) & unresolved.shift(0, 2)
+                | unresolved.shift(0, -1) & unresolved.shift(0, -2)
+            ).to_array(dtype=bool)
+            if lines.any():
+                return self._random_cell(lines)
+
+            neighbours = unknown & unresolved.neighbours().to_array(dtype=bool)
+            if neighbours.any():
+                return self._random_cell(neighbours)
+
+        lattice = unknown & parity_masks(self.config.board_size, min(self.remaining))[0]
+        return self._random_cell(lattice if lattice.any() else unknown)
+
+
+class HeatmapStrategy(Strategy):
+    """Fires at the argmax of the placement heatmap of the ships still afloat, like BotGame."""
+
+    label = "AI (heatmap)"
+
+    def __init__(self, config=DEFAULT_CONFIG, rng=None):
+        super().__init__(config, rng)
+        self.density = IncrementalDensity(config.board_size, config.ships)
+
+    def next_move(self, time_budget=None):
+        probabilities = self.density.probabilities
+        return np.unravel_index(probabilities.argmax(), probabilities.shape)
+
+    def record_shot(self, row, col, is_hit):
+        super().record_shot(row, col, is_hit)
+        self.density.record_shot(row, col, is_hit)
+
+    def record_sink(self, ship):
+        super().record_sink(ship)
+        self.density.record_sink(ship.popcount(), ship.flat_cells())
+
+
+class HuntTargetStrategy(HeatmapStrategy):
+    """
+    The heatmap split into a hunt and a target mode.
+    Hunting, while every hit belongs to a sunk ship, it only considers the parity lattice of the smallest ship
+    afloat, so it never spends a shot where that ship cannot be found by elimination. The lattice offset is
+    picked once per ship length, where the heatmap had the most weight.
+    Targeting, it scores only the placements that cover an unresolved hit and fires at their argmax.
+
+    It is not cheaper than HeatmapStrategy. Hunting still ranks the lattice by the full heatmap, so that is kept
+    up to date on every shot as before, and targeting adds a density_around pass on top. On the classic board it
+    does not fire fewer shots either, the heatmap's argmax already lands on the lattice.
+    """
+
+    label = "AI (hunt/target)"
+
+    def __init__(self, config=DEFAULT_CONFIG, rng=None):
+        super().__init__(config, rng)
+        # Lattice in use per smallest ship length
+        self.lattices = dict()
+
+    def next_move(self, time_budget=None):
+        unknown = self.hits_misses == 0
+        unresolved = (self.hits_misses == 1) & ~self.sunk
+
+        if unresolved.any():
+            scores = np.where(unknown, self.density.density_around(np.flatnonzero(unresolved)), -1)
+            if scores.max() > 0:
+                return np.unravel_index(scores.argmax(), scores.shape)
+
+        scores = np.where(unknown & self._lattice(), self.density.probabilities, -1)
+        if scores.max() <= 0:
+            # Lattice used up, or hits with no sink reported. Back to the whole board
+            return super().next_move(time_budget)
+        return np.unravel_index(scores.argmax(), scores.shape)
+
+    def _lattice(self):
+        smallest = min(self.remaining)
+        if smallest not in self.lattices:
+            masks = parity_masks(self.config.board_size, smallest)
+            weight = (masks * self.density.probabilities).sum(axis=(1, 2))
+            self.lattices[smallest] = masks[weight.argmax()]
+        return self.lattices[smallest]
+
+
+class MonteCarloStrategy(Strategy):
+    """Fires at the most likely cell under sampled fleets consistent with all hits, misses and sinks."""
+
+    label = "AI (MC)"
+
+    def __init__(self, config=DEFAULT_CONFIG, rng=None):
+        super().__init__(config, rng)
+        self.targeter = MonteCarloTargeter(config.board_size, config.ships, rng=self.rng)
+
+    def next_move(self, time_budget=None):
+        return self.targeter.next_move(time_budget)
+
+    def record_shot(self, row, col, is_hit):
+        super().record_shot(row, col, is_hit)
+        self.targeter.record_shot(row, col, is_hit)
+
+    def record_sink(self, ship):
+        super().record_sink(ship)
+        self.targeter.record_sink(ship.popcount(), ship.flat_cells())
+
+
+# Every strategy by name, in the order the player selection button cycles through them
+STRATEGIES = {
+    "random": RandomStrategy,
+    "parity": ParityStrategy,
+    "heatmap": HeatmapStrategy,
+    "hunttarget": HuntTargetStrategy,
+    "montecarlo": MonteCarloStrategy,
+}
+
+
+def make_strategy(name, config=DEFAULT_CONFIG, rng=None):
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown strategy {name!r}. Expected one of {tuple(STRATEGIES)}.")
+    return STRATEGIES[name](config, rng)
@@ -0,0 +1,224 @@
+"""
+Headless tournament between targeting strategies.
+
+Every strategy plays the same seeded boards, so differences come from the strategies and not from luck of the draw.
+Boards are then paired into matches: in each pair of boards both strategies get one board each and then swap,
+with the first move alternating. The player who sinks the whole fleet in fewer turns wins, the one that moved
+first wins if they need the same number.
+    python tournament.py --games 2000 --seed 0
+    python tournament.py --games 200 --strategies heatmap montecarlo --time-budget 0.02
+"""
+import argparse
+import multiprocessing
+
+import numpy as np
+
+from bitboard import Bitboard
+from config import CLASSIC_FLEET, DEFAULT_CONFIG, GameConfig
+from engine import fleet_boards, generate_random_fleets
+from simulate import chunk_jobs, percentile
+from strategies import STRATEGIES, make_strategy
+
+# z score of a two sided 95% confidence interval
+Z_95 = 1.959963984540054
+
+# Resamples drawn for the bootstrap interval of the median
+BOOTSTRAP_RESAMPLES = 2000
+
+
+def play_strategy_game(strategy, ship_ids, time_budget=None):
+    """Let a strategy fire at a fleet_boards ship_ids board until every ship is sunk. Returns the turns it took."""
+    ship_cells_left = np.bincount(ship_ids.ravel(), minlength=len(strategy.config.ships) + 1)
+    ship_cells_left[0] = 0
+
+    turns = 0
+    while ship_cells_left.any():
+        row, col = strategy.next_move(time_budget)
+        ship_id = ship_ids[row, col]
+        strategy.record_shot(row, col, ship_id != 0)
+        turns += 1
+
+        if ship_id != 0:
+            ship_cells_left[ship_id] -= 1
+            if ship_cells_left[ship_id] == 0:
+                strategy.record_sink(Bitboard.from_cells(np.flatnonzero(ship_ids == ship_id), len(ship_ids)))
+
+    return turns
+
+
+def play_strategy_chunk(name, seed, games, config=DEFAULT_CONFIG, time_budget=None):
+    """
+    Play one strategy on a chunk of boards drawn from the seed. Every strategy given the same seed sees the
+    same boards. The strategy's own randomness is seeded from the seed and its name, so reruns repeat exactly.
+    Returns the (games,) turns to win on each board.
+    """
+    fleets = generate_random_fleets(games, np.random.default_rng(seed), config)
+    strategy_seed = (seed, list(STRATEGIES).index(name))
+
+    turns = np.zeros(games, dtype=np.int32)
+    for game, ship_ids in enumerate(fleet_boards(fleets, config, ship_ids=True)):
+        strategy = make_strategy(name, config, np.random.default_rng(strategy_seed + (game,)))
+        turns[game] = play_strategy_game(strategy, ship_ids, time_budget)
+    return turns
+
+
+def _play_strategy_chunk_star(args):
+    return play_strategy_chunk(*args)
+
+
+def run_tournament(names, games, workers=None, chunk_size=100, seed=None, config=DEFAULT_CONFIG, time_budget=None):
+    """
+    Play every strategy on the same games boards across a pool of workers.
+    Returns a (len(names), games) array of the turns each strategy took on each board.
+    """
+    for name in names:
+        if name not in STRATEGIES:
+            raise ValueError(f"Unknown strategy {name!r}. Expected one of {tuple(STRATEGIES)}.")
+
+    chunks = chunk_jobs(games, chunk_size, seed)
+    jobs = [
+        (name, chunk_seed, chunk_games, config, time_budget)
+        for name in names
+        for chunk_seed, chunk_games, _ in chunks
+    ]
+    # Where each job's turns go
+    slots = [
+        (strategy, slice(first_game, first_game + chunk_games))
+        for strategy in range(len(names))
+        for _, chunk_games, first_game in chunks
+    ]
+
+    turns = np.zeros((len(names), games), dtype=np.int32)
+    if workers == 1:
+        results = map(_play_strategy_chunk_star, jobs)
+        for (strategy, games_slice), chunk_turns in zip(slots, results):
+            turns[strategy, games_slice] = chunk_turns
+        return turns
+
+    with multiprocessing.Pool(workers) as pool:
+        for (strategy, games_slice), chunk_turns in zip(slots, pool.imap(_play_strategy_chunk_star, jobs)):
+            turns[strategy, games_slice] = chunk_turns
+    return turns
+
+
+def head_to_head_wins(turns_a, turns_b):
+    """
+    Pair up the boards and play both sides of every pair: A on the even board moving first against B on the odd
+    one, then B on the even board moving first against A on the odd one. Returns (wins of A, games played).
+    """
+    pairs = len(turns_a) // 2
+    a_even, a_odd = turns_a[0:2 * pairs:2], turns_a[1:2 * pairs:2]
+    b_even, b_odd = turns_b[0:2 * pairs:2], turns_b[1:2 * pairs:2]
+
+    wins = np.count_nonzero(a_even <= b_odd) + np.count_nonzero(a_odd < b_even)
+    return wins, 2 * pairs
+
+
+def wilson_interval(wins, games, z=Z_95):
+    """Wilson score interval of a win rate. Stays inside [0, 1] and behaves near 0% and 100%, unlike the normal one."""
+    if games == 0:
+        return 0.0, 1.0
+
+    rate = wins / games
+    denominator = 1 + z * z / games
+    center = (rate + z * z / (2 * games)) / denominator
+    margin = z * np.sqrt(rate * (1 - rate) / games + z * z / (4 * games * games)) / denominator
+    return center - margin, center + margin
+
+
+def mean_interval(turns, z=Z_95):
+    """Mean turns and its normal approximation confidence interval."""
+    mean = turns.mean()
+    margin = z * turns.std(ddof=1) / np.sqrt(len(turns)) if len(turns) > 1 else np.inf
+    return mean, mean - margin, mean + margin
+
+
+def histogram_medians(values, counts):
+    """Median of every row of counts, each a histogram over the sorted values. Averages the middle two like np.median."""
+    cumulative = np.cumsum(counts, axis=-1)
+    games = cumulative[..., -1:]
+    # The value at 0 based rank r is the first one whose cumulative count passes r
+    low = values[(cumulative <= (games - 1) // 2).sum(axis=-1)]
+    high = values[(cumulative <= games // 2).sum(axis=-1)]
+    return (low + high) / 2
+
+
+def median_interval(histogram, rng=None, resamples=BOOTSTRAP_RESAMPLES):
+    """
+    Median turns and its 95% percentile bootstrap confidence interval, from a histogram of turns to win.
+    Resamples are drawn as histograms too, so memory grows with the distinct turn counts and not with the games.
+    """
+    rng = np.random.default_rng(rng)
+    values = np.flatnonzero(histogram)
+    counts = histogram[values]
+    games = counts.sum()
+
+    medians = histogram_medians(values, rng.multinomial(games, counts / games, size=resamples))
+    low, high = np.percentile(medians, (2.5, 97.5))
+    return histogram_medians(values, counts), low, high
+
+
+def summarize(names, turns, percentiles=(5, 95), seed=None):
+    lines = [f"Boards per strategy: {turns.shape[1]}", "", "Turns to win, 95% confidence intervals:"]
+
+    for name, strategy_turns in zip(names, turns):
+        histogram = np.bincount(strategy_turns)
+        mean, mean_low, mean_high = mean_interval(strategy_turns)
+        median, median_low, median_high = median_interval(histogram, seed)
+        quantiles = "  ".join(f"P{q:g} {percentile(histogram, q)}" for q in percentiles)
+        lines.append(
+            f"{name:12s} mean {mean:7.3f} [{mean_low:7.3f}, {mean_high:7.3f}]"
+            f"  median {median:5.1f} [{median_low:5.1f}, {median_high:5.1f}]  {quantiles}"
+        )
+
+    if len(names) > 1:
+        lines += ["", "Head to head win rate of the row strategy, 95% Wilson intervals:"]
+        for a, name_a in enumerate(names):
+            for b, name_b in enumerate(names):
+                if a == b:
+                    continue
+                wins, games = head_to_head_wins(turns[a], turns[b])
+                low, high = wilson_interval(wins, games)
+                lines.append(
+                    f"{name_a:12s} vs {name_b:12s} {wins:7d}/{games:<7d} {wins / games:6.1%}"
+                    f" [{low:6.1%}, {high:6.1%}]"
+                )
+
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Play targeting strategies against each other on shared boards.")
+    parser.add_argument("--strategies", nargs="+", default=list(STRATEGIES), choices=list(STRATEGIES))
+    parser.add_argument("--games", type=int, default=1000, help="boards every strategy plays, paired into matches")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to the core count")
+    parser.add_argument("--chunk-size", type=int, default=100, help="boards per task handed to a worker")
+    parser.add_argument("--seed", type=int, default=None, help="base seed, random if not given")
+    parser.add_argument("--time-budget", type=float, default=None,
+                        help="seconds per move for strategies that search, like montecarlo")
+    parser.add_argument("--board-size", type=int, default=DEFAULT_CONFIG.board_size)
+    parser.add_argument("--ships", type=int, nargs="+", default=None,
+                        help="ship lengths, defaults to one classic fleet per 10 cells of board width")
+    args = parser.parse_args()
+
+    if args.games < 2:
+        parser.error("--games has to be at least 2, boards are played in pairs")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size has to be at least 1")
+
+    try:
+        if args.ships is None:
+            config = GameConfig.scaled(args.board_size, CLASSIC_FLEET)
+        else:
+            config = GameConfig(args.board_size, args.ships)
+    except ValueError as error:
+        parser.error(str(error))
+
+    turns = run_tournament(
+        args.strategies, args.games, args.workers, args.chunk_size, args.seed, config, args.time_budget
+    )
+    print(summarize(args.strategies, turns, seed=args.seed))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""
+Checks of the fast engine against slow reference implementations of the same thing.
+    python verify.py density --boards 3000
+    python verify.py incremental --games 200
+    python verify.py montecarlo --samples 20000
+    python verify.py all
+
+Every check prints how many cases it compared and how many disagreed, and the script exits with status 1
+if any case disagreed.
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from config import DEFAULT_CONFIG
+from density import IncrementalDensity, fleet_density, placement_cells
+from engine import fleet_boards, generate_random_fleets
+from montecarlo import MonteCarloTargeter
+
+# Largest difference in any cell's probability the montecarlo check lets pass
+MONTECARLO_TOLERANCE = 0.05
+
+# (board_size, ships, hits, misses) boards of the montecarlo check, with (row, col) shots. The first is the one
+# copies of a single chain got up to 0.38 wrong, a hit that either of two ships can cover
+MONTECARLO_BOARDS = (
+    (10, (5, 4, 3, 3, 2), ((4, 4),), ((4, 5), (3, 4))),
+    (6, (3, 2, 2), ((2, 2), (3, 3)), ((2, 3), (3, 2), (0, 0), (5, 5))),
+)
+
+
+def reference_ship_density(board_with_hits, board_with_misses, length_of_the_ship):
+    """The original per placement loop of possibibleLocationsProbability, for any board size."""
+    board_size = board_with_hits.shape[0]
+    final_matrix = np.zeros((board_size, board_size))
+
+    for horizontal in (True, False):
+        for line in range(board_size):
+            for start in range(board_size - length_of_the_ship + 1):
+                cells = [(line, start + i) if horizontal else (start + i, line) for i in range(length_of_the_ship)]
+                if any(board_with_misses[cell] != 0 for cell in cells):
+                    continue
+
+                hits = [cell for cell in cells if board_with_hits[cell] == 1]
+                if not hits:
+                    multiplier = 1
+                else:
+                    # Horizontal placements count every hit, vertical ones only that there is one
+                    multiplier = 4 * len(hits) if horizontal else 4
+
+                for cell in cells:
+                    if cell not in hits:
+                        final_matrix[cell] += float(length_of_the_ship) * multiplier
+
+    return final_matrix
+
+
+def reference_fleet_density(board_with_hits, board_with_misses, ships):
+    return sum(reference_ship_density(board_with_hits, board_with_misses, length) for length in ships)
+
+
+def random_observations(rng, config=DEFAULT_CONFIG):
+    """
+    A random fleet with a random number of random shots at it.
+    Returns (board_with_hits, board_with_misses, ship_ids) with hits and misses 1 where they were seen.
+    """
+    ship_ids = fleet_boards(generate_random_fleets(1, rng, config), config, ship_ids=True)[0]
+    shots = np.zeros(config.cell_count, dtype=bool)
+    shots[rng.permutation(config.cell_count)[:rng.integers(config.cell_count)]] = True
+    shots = shots.reshape(ship_ids.shape)
+
+    board_with_hits = (shots & (ship_ids != 0)).astype(np.int8)
+    board_with_misses = (shots & (ship_ids == 0)).astype(np.int8)
+    return board_with_hits, board_with_misses, ship_ids
+
+
+def check_density(args):
+    """fleet_density against the original loops on random boards."""
+    rng = np.random.default_rng(args.seed)
+    mismatches = 0
+    for _ in range(args.boards):
+        board_with_hits, board_with_misses, _ = random_observations(rng)
+        expected = reference_fleet_density(board_with_hits, board_with_misses, DEFAULT_CONFIG.ships)
+        mismatches += not np.array_equal(fleet_density(board_with_hits, board_with_misses, DEFAULT_CONFIG.ships),
+                                         expected)
+
+    print(f"density: {args.boards} boards, {mismatches} mismatches")
+    return mismatches == 0
+
+
+def check_incremental(args):
+    """
+    IncrementalDensity against a full fleet_density rescan after every shot of random games, with every sink
+    reported. Sunk ships leave the fleet and their cells count as misses in the rescan.
+    """
+    rng = np.random.default_rng(args.seed)
+    config = DEFAULT_CONFIG
+    shots_compared = 0
+    mismatches = 0
+
+    for _ in range(args.games):
+        _, _, ship_ids = random_observations(rng, config)
+        density = IncrementalDensity(config.board_size, config.ships)
+        board_with_hits = np.zeros_like(ship_ids, dtype=np.int8)
+        board_with_misses = np.zeros_like(ship_ids, dtype=np.int8)
+        remaining = list(config.ships)
+
+        for cell in rng.permutation(config.cell_count):
+            row, col = divmod(int(cell), config.board_size)
+            ship_id = ship_ids[row, col]
+            density.record_shot(row, col, ship_id != 0)
+
+            if ship_id == 0:
+                board_with_misses[row, col] = 1
+            else:
+                board_with_hits[row, col] = 1
+                on_ship = ship_ids == ship_id
+                if board_with_hits[on_ship].all():
+                    length_of_the_ship = int(on_ship.sum())
+                    density.record_sink(length_of_the_ship, np.flatnonzero(on_ship))
+                    remaining.remove(length_of_the_ship)
+                    board_with_hits[on_ship] = 0
+                    board_with_misses[on_ship] = 1
+
+            if not remaining:
+                break
+            expected = fleet_density(board_with_hits, board_with_misses, remaining)
+            mismatches += not np.array_equal(density.probabilities, expected)
+            shots_compared += 1
+
+    print(f"incremental: {args.games} games, {shots_compared} shots, {mismatches} mismatches")
+    return mismatches == 0
+
+
+def reference_posterior(board_size, ships, hits, misses, samples, rng, block=1 << 14):
+    """
+    Rejection sampling of the fleets consistent with the flat hit and miss cells: every ship is drawn uniformly
+    from all its placements and fleets with an overlap, a ship on a miss or an uncovered hit are thrown away.
+    Returns the (board_size, board_size) share of kept fleets with a ship on each cell.
+    """
+    tables = [placement_cells(board_size, length)[0] for length in ships]
+    counts = np.zeros(board_size * board_size)
+    kept = 0
+    while kept < samples:
+        occupied = np.zeros((block, board_size * board_size), dtype=np.int8)
+        rows = np.arange(block)[:, None]
+        for cells in tables:
+            occupied[rows, cells[rng.integers(len(cells), size=block)]] += 1
+
+        consistent = (occupied <= 1).all(axis=1) & ~occupied[:, misses].any(axis=1) & occupied[:, hits].all(axis=1)
+        counts += occupied[consistent].sum(axis=0)
+        kept += consistent.sum()
+    return (counts / kept).reshape(board_size, board_size)
+
+
+def check_montecarlo(args):
+    """MonteCarloTargeter's posterior against rejection sampling on a few small constrained boards."""
+    rng = np.random.default_rng(args.seed)
+    failures = 0
+    for board_size, ships, hits, misses in MONTECARLO_BOARDS:
+        targeter = MonteCarloTargeter(board_size, ships, rng=rng)
+        for shots, is_hit in (misses, False), (hits, True):
+            for row, col in shots:
+                targeter.record_shot(row, col, is_hit)
+        probabilities, samples = targeter.posterior(args.time_budget)
+
+        flat = [[row * board_size + col for row, col in shots] for shots in (hits, misses)]
+        expected = reference_posterior(board_size, ships, *flat, args.samples, rng)
+        error = np.abs(probabilities - expected).max()
+        failures += not error < MONTECARLO_TOLERANCE
+        print(f"montecarlo: {board_size}x{board_size} {ships}, {samples} samples, max error {error:.3f}")
+
+    return failures == 0
+
+
+CHECKS = {
+    "density": check_density,
+    "incremental": check_incremental,
+    "montecarlo": check_montecarlo,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the fast engine against slow reference implementations.")
+    parser.add_argument("check", choices=list(CHECKS) + ["all"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--boards", type=int, default=1000, help="random boards compared by the density check")
+    parser.add_argument("--games", type=int, default=200, help="random games replayed by the incremental check")
+    parser.add_argument("--samples", type=int, default=20000,
+                        help="fleets the montecarlo check keeps from rejection sampling per board")
+    parser.add_argument("--time-budget", type=float, default=1.0,
+                        help="seconds the montecarlo check gives the sampler per board")
+    args = parser.parse_args()
+
+    checks = CHECKS.values() if args.check == "all" else [CHECKS[args.check]]
+    passed = [check(args) for check in checks]
+    sys.exit(0 if all(passed) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,34 @@
-import pygame
+import argparse
+import gzip
+import hashlib
+import json
+import multiprocessing
 import numpy as np
 import os
-from random import random
+import string
+from functools import lru_cache
 
 LOCAL_DIR = os.path.dirname(__file__)
 FONT_ADDRESS = os.path.join(LOCAL_DIR, "Fonts/dogica.ttf")
 
 FONT_HEIGHT = 8
-pygame.font.init()
+
+# Glyph dots are cached here per font file contents and height, so a font is only rendered the first time it is used
+GLYPH_CACHE_DIR = os.path.join(LOCAL_DIR, "Fonts", "cache")
+# Characters rendered into a glyph cache
+ALPHABET = string.ascii_uppercase
+
+# Dots formatted and written at a time, so deep folds never hold the whole output text in memory
+WRITE_CHUNK_DOTS = 1 << 16
+
+# How the paper is held while unfolding. "dots" keeps a coordinate array, "raster" a bitmap of the whole paper.
+# The bitmap costs one bit per cell of paper however many dots it has, but the paper doubles in area every fold
+# while the dots only grow by 4/3. It is only the smaller of the two for a few folds on dense text
+PAPER_MODEL = "dots"
+PAPER_MODELS = ("dots", "raster")
+
+# Cells of the raster paper unpacked at a time while folding, so a fold needs little more than the packed bitmaps
+RASTER_BLOCK_CELLS = 1 << 18
 
 def grey(n):
     return n, n, n
@@ -48,35 +69,57 @@ def reselect_prompt(f, t):
 
     return int(option)
 
+def font_hash(font_address):
+    with open(font_address, "rb") as infile:
+        return hashlib.sha256(infile.read()).hexdigest()
+
+def render_glyphs(font_address, font_height, chars):
+    """Dots of every char as an int16 Nx2 array of (x, y), with all blank columns and rows removed"""
+    # Only the font module is needed, so batch runs never touch the display
+    import pygame
+    pygame.font.init()
+
+    font = pygame.font.Font(font_address, font_height)
+    glyphs = dict()
+    for char in chars:
+        pixels = pygame.surfarray.array3d(font.render(char, False, grey(0)))
+
+        blank = pixels[:, :, 0] == 255
+        pixels = pixels[~blank.all(axis=1)][:, ~blank.all(axis=0)]
+
+        glyphs[char] = np.argwhere(np.any(pixels == 0, axis=2)).astype(np.int16)
+    return glyphs
+
+@lru_cache(maxsize=None)
+def load_glyphs(font_address=FONT_ADDRESS, font_height=FONT_HEIGHT):
+    """The ALPHABET's glyph dots for a font, from the glyph cache. Rendered and cached on first use"""
+    path = os.path.join(GLYPH_CACHE_DIR, f"{font_hash(font_address)}_{font_height}.npz")
+    if os.path.exists(path):
+        with np.load(path) as data:
+            return dict(zip(str(data["chars"]), np.split(data["dots"], data["offsets"])))
+
+    glyphs = render_glyphs(font_address, font_height, ALPHABET)
+
+    os.makedirs(GLYPH_CACHE_DIR, exist_ok=True)
+    # Written under a temporary name first, so parallel runs never read a half written cache
+    temporary = f"{path}.{os.getpid()}.npz"
+    np.savez_compressed(
+        temporary,
+        chars=np.array(ALPHABET),
+        dots=np.concatenate([glyphs[char] for char in ALPHABET]),
+        offsets=np.cumsum([len(glyphs[char]) for char in ALPHABET])[:-1],
+    )
+    os.replace(temporary, path)
+    return glyphs
+
 def get_char_dots(t):
-    def remove_blank_edges(array):
-        """Remove all blank borders"""
-        idx = np.argwhere(np.all(array[0,:,:][..., :] == 255, axis=0))
-        array = np.delete(array, idx, axis=2)
-        
-        idx = np.argwhere(np.all(array[0,:,:][:, ...] == 255, axis=1))
-        array = np.delete(array, idx, axis=1)
-
-        return array
-
-    font = pygame.font.Font(FONT_ADDRESS, FONT_HEIGHT)
-    char_dots = dict()
-    for char in set(t):
-        if char == " ": continue
-        surf = font.render(char, False, grey(0))
-
-        array = pygame.surfarray.array3d(surf).T
-        array = remove_blank_edges(array).T
-
-        dots = set()
-        for y in range(array.shape[1]):
-            for x in range(array.shape[0]):
-                if np.any(array[x, y, :] == 0):
-                    dots.add((x, y))
-
-        char_dots[char] = dots
-    
-    return char_dots
+    glyphs = load_glyphs(FONT_ADDRESS, FONT_HEIGHT)
+
+    missing = set(t) - set(glyphs) - {" "}
+    if missing:
+        glyphs = {**glyphs, **render_glyphs(FONT_ADDRESS, FONT_HEIGHT, missing)}
+
+    return {char: set(map(tuple, glyphs[char].tolist())) for char in set(t) if char != " "}
 
 def generate_initial_paper(char_dots, t):
     initial_dots = set()
@@ -92,47 +135,223 @@ def generate_initial_paper(char_dots, t):
         dx += max_x + 2
     return initial_dots
 
-def unfold_paper(dots, fold_count):
+def unique_dots(dots):
+    """Sorted unique rows of an Nx2 dot array. Each dot is packed into one int64 key so np.unique sorts a flat array."""
+    keys = np.unique(dots[:, 0].astype(np.int64) << 32 | dots[:, 1].astype(np.int64))
+    return np.stack((keys >> 32, keys & 0xFFFFFFFF), axis=1).astype(np.int32)
+
+def unfold_dots(dots, fold_count, rng=None):
     """
-    Return:
-    1. The set of dots that make up the puzzle input
-    2. The folds that the puzzle solver have to make in order.
-         Not reversed order AKA the order my input maker unfolds.
+    unfold_paper on an int32 Nx2 array of (x, y) dots. Every fold mirrors the whole array at once
+    and draws all of its keep/mirror decisions in one call to the generator.
+    The dots are kept sorted by (x, y), so the draws go to the dots in the same order as in unfold_raster.
     """
+    rng = np.random.default_rng(rng)
+    dots = unique_dots(np.asarray(dots, dtype=np.int32).reshape(-1, 2))
+
     folds = []
     for _ in range(fold_count):
-        max_x = max(x for x,y in dots)
-        max_y = max(y for x,y in dots)
+        max_x, max_y = dots.max(axis=0)
         if max_x > max_y:
-            var = "y"
-            n = max_y + 1
+            var, axis = "y", 1
+            n = int(max_y) + 1
         else:
-            var = "x"
-            n = max_x + 1
+            var, axis = "x", 0
+            n = int(max_x) + 1
+
+        if 2 * n > np.iinfo(np.int32).max:
+            raise OverflowError(f"Unfolding along {var}={n} does not fit in int32 coordinates.")
 
         folds.append((var, n))
 
-        new_dots = set()
-        for x, y in dots:
-            old = (x, y)
-            if var == "y":
-                dy = abs(n - y)
-                new = (x, n + dy)
+        # Mirrored dots land on the far side of the fold line, so they never collide with the old ones
+        new = dots.copy()
+        new[:, axis] = 2 * n - dots[:, axis]
+
+        r = rng.random(len(dots))
+        dots = np.concatenate((new[r < 2/3], dots[r > 1/3]))
+        dots = dots[np.lexsort((dots[:, 1], dots[:, 0]))]
+
+    return dots, reversed(folds)
+
+def dots_to_paper(dots):
+    """Bitmap indexed [x, y] just big enough for an Nx2 dot array, packed 8 cells per byte along y like np.packbits"""
+    dots = np.asarray(dots, dtype=np.intp).reshape(-1, 2)
+    height, width = dots.max(axis=0) + 1
+    paper = np.zeros((height, -(-width // 8)), dtype=np.uint8)
+    np.bitwise_or.at(paper, (dots[:, 0], dots[:, 1] >> 3), (0x80 >> (dots[:, 1] & 7)).astype(np.uint8))
+    return paper
+
+def paper_blocks(paper):
+    """(first row, rows) blocks of a packed bitmap of about RASTER_BLOCK_CELLS cells each"""
+    rows = max(1, RASTER_BLOCK_CELLS // (8 * paper.shape[1]))
+    for start in range(0, len(paper), rows):
+        yield start, paper[start:start + rows]
+
+def paper_to_dots(paper):
+    """Sorted int32 Nx2 dot array of a packed bitmap"""
+    dots = []
+    for start, block in paper_blocks(paper):
+        block_dots = np.argwhere(np.unpackbits(block, axis=1)).astype(np.int32)
+        block_dots[:, 0] += start
+        dots.append(block_dots)
+    return np.concatenate(dots) if dots else np.zeros((0, 2), dtype=np.int32)
+
+def unfold_raster(paper, fold_count, rng=None):
+    """
+    unfold_paper on a packed bitmap from dots_to_paper. A fold out is the paper flipped past the fold line,
+    with a random keep mask on each half. One draw per dot, like unfold_dots.
+    The bitmap stays packed, only a block of rows at a time is unpacked to be flipped and masked.
+    """
+    rng = np.random.default_rng(rng)
+
+    folds = []
+    for _ in range(fold_count):
+        # Trim empty edges so the fold lines match the dot based version
+        max_x = np.flatnonzero(paper.any(axis=1))[-1]
+        max_y = np.flatnonzero(np.unpackbits(np.bitwise_or.reduce(paper, axis=0)))[-1]
+        paper = paper[:max_x + 1, :max_y // 8 + 1]
+
+        if max_x > max_y:
+            var, axis = "y", 1
+            n = int(max_y) + 1
+        else:
+            var, axis = "x", 0
+            n = int(max_x) + 1
+
+        folds.append((var, n))
+
+        if axis == 0:
+            new_paper = np.zeros((2 * n + 1, paper.shape[1]), dtype=np.uint8)
+        else:
+            new_paper = np.zeros((len(paper), -(-(2 * n + 1) // 8)), dtype=np.uint8)
+
+        # Blocks go in row order, so the draws go to the dots in the same order as in unfold_dots
+        for start, block in paper_blocks(paper):
+            stop = start + len(block)
+            cells = np.unpackbits(block, axis=1, count=max_y + 1).astype(bool)
+
+            r = rng.random(np.count_nonzero(cells))
+            mirror = np.zeros_like(cells)
+            mirror[cells] = r < 2/3
+            keep = np.zeros_like(cells)
+            keep[cells] = r > 1/3
+
+            if axis == 0:
+                # Row x is mirrored to row 2 * n - x
+                new_paper[start:stop] = np.packbits(keep, axis=1)
+                new_paper[2 * n - stop + 1:2 * n - start + 1] = np.packbits(mirror[::-1], axis=1)
             else:
-                dx = abs(n - x)
-                new = (n + dx, y)
+                new_block = np.zeros((len(block), 2 * n + 1), dtype=bool)
+                new_block[:, :n] = keep
+                new_block[:, n + 1:] = mirror[:, ::-1]
+                new_paper[start:stop] = np.packbits(new_block, axis=1)
+        paper = new_paper
 
-            r = random()
-            if r < 2/3:
-                new_dots.add(new)
-            if r > 1/3:
-                new_dots.add(old)
+    return paper, reversed(folds)
 
-        dots = new_dots
+def unfold(dots, fold_count, model=PAPER_MODEL, rng=None):
+    """Unfold an Nx2 dot array with either paper model. Returns the int32 Nx2 dots and the folds like unfold_paper"""
+    if model not in PAPER_MODELS:
+        raise ValueError(f"Unknown paper model {model!r}. Expected one of {PAPER_MODELS}.")
 
-    return dots, reversed(folds)
+    if model == "raster":
+        paper, folds = unfold_raster(dots_to_paper(dots), fold_count, rng)
+        return paper_to_dots(paper), folds
+    return unfold_dots(dots, fold_count, rng)
 
-def main():
+def unfold_paper(dots, fold_count):
+    """
+    Return:
+    1. The set of dots that make up the puzzle input
+    2. The folds that the puzzle solver have to make in order.
+         Not reversed order AKA the order my input maker unfolds.
+    """
+    dots, folds = unfold_dots(list(dots), fold_count)
+    return set(map(tuple, dots.tolist())), folds
+
+def write_output(address, dots, folds, compress=None):
+    """
+    Write the Nx2 dots, a blank line and then the folds in order.
+    Each chunk of dots is formatted with one string operation instead of a print per dot.
+    The file is gzipped if compress is set, by default when the address ends in .gz
+    """
+    if compress is None:
+        compress = address.endswith(".gz")
+
+    with (gzip.open if compress else open)(address, "wt") as outfile:
+        for start in range(0, len(dots), WRITE_CHUNK_DOTS):
+            chunk = dots[start:start + WRITE_CHUNK_DOTS]
+            outfile.write(("%d,%d\n" * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+        outfile.write("\n")
+
+        for var, n in folds:
+            outfile.write(f"fold along {var}={n}\n")
+
+def generate(t, f, address, model=PAPER_MODEL, seed=None):
+    """Make one puzzle input for the text with f folds at address. Returns the number of dots"""
+    char_dots_map = get_char_dots(t)
+
+    initial_dots = generate_initial_paper(char_dots_map, t)
+
+    result_dots, folds = unfold(list(initial_dots), f, model, seed)
+
+    write_output(address, result_dots, folds)
+    return len(result_dots)
+
+def generate_job(job):
+    count = generate(job["text"], job["folds"], job["path"], job["model"], job["seed"])
+    return dict(job, dots=count)
+
+def read_texts(path):
+    """One text per line. Blank lines and lines starting with # are skipped"""
+    with open(path) as infile:
+        return [line.strip() for line in infile if line.strip() and not line.startswith("#")]
+
+def batch(texts, f, seeds=None, output_dir=os.path.join(LOCAL_DIR, "Output"), model=PAPER_MODEL, workers=None,
+          compress=False):
+    """
+    Generate every text with every seed across a pool of worker processes. Files are gzipped if compress is set.
+    Without seeds each text gets one fresh seed, recorded in the manifest so the output can be made again.
+    Writes output_dir/manifest.json describing every file and returns its entries.
+    """
+    # Each (text, seed) is made once, a repeat would have two workers writing the same file
+    texts = list(dict.fromkeys(t.upper() for t in texts))
+    for t in texts:
+        if not t.replace(" ", "").isalpha():
+            raise ValueError(f"Only letters allowed, got {t!r}.")
+
+    seeds = list(dict.fromkeys(seeds)) if seeds else [None]
+
+    os.makedirs(output_dir, exist_ok=True)
+    # Fill the glyph cache once up front, the workers then only read it
+    load_glyphs(FONT_ADDRESS, FONT_HEIGHT)
+
+    jobs = []
+    for t in texts:
+        for seed in seeds:
+            if seed is None:
+                seed = int(np.random.SeedSequence().generate_state(1)[0])
+            jobs.append({
+                "text": t,
+                "folds": f,
+                "seed": seed,
+                "model": model,
+                "path": os.path.join(output_dir, f"{t}_{seed}.txt" + (".gz" if compress else "")),
+            })
+
+    if workers == 1:
+        entries = list(map(generate_job, jobs))
+    else:
+        with multiprocessing.Pool(workers) as pool:
+            entries = pool.map(generate_job, jobs)
+
+    with open(os.path.join(output_dir, "manifest.json"), "w") as outfile:
+        json.dump({"folds": f, "model": model, "outputs": entries}, outfile, indent=2)
+    return entries
+
+def interactive():
 
     f = fold_prompt()
     t = text_prompt()
@@ -151,23 +370,40 @@ def main():
     print(f"Folds: {f}")
     print(f"Text: {t}")
 
-    char_dots_map = get_char_dots(t)
-
-    initial_dots = generate_initial_paper(char_dots_map, t)
-
-    result_dots, folds = unfold_paper(initial_dots, f)
-
     filename = f"Output/{t}.txt"
     address = os.path.join(LOCAL_DIR, filename)
-    with open(address, "w") as outfile:
-        for x, y in result_dots:
-            print(f"{x},{y}", file=outfile)
-
-        print("", file=outfile)
+    generate(t, f, address)
 
-        for var, n in folds:
-            print(f"fold along {var}={n}", file=outfile)
-        
+def main():
+    parser = argparse.ArgumentParser(
+        description="Make Advent of Code 2021 day 13 inputs. Prompts for the text and folds when run without arguments."
+    )
+    parser.add_argument("texts", nargs="*", help="texts to generate, letters and spaces only")
+    parser.add_argument("--texts-file", help="file with one text per line")
+    parser.add_argument("--folds", type=int, help="number of folds")
+    parser.add_argument("--seeds", type=int, nargs="+", help="every text is generated once per seed")
+    parser.add_argument("--output-dir", default=os.path.join(LOCAL_DIR, "Output"))
+    parser.add_argument("--model", choices=PAPER_MODELS, default=PAPER_MODEL)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes, defaults to the core count")
+    parser.add_argument("--gzip", action="store_true", help="write gzipped .txt.gz files")
+    args = parser.parse_args()
+
+    texts = list(args.texts)
+    if args.texts_file is not None:
+        texts += read_texts(args.texts_file)
+
+    if not texts:
+        interactive()
+        return
+
+    if args.folds is None:
+        parser.error("--folds is needed when texts are given")
+
+    try:
+        entries = batch(texts, args.folds, args.seeds, args.output_dir, args.model, args.workers, args.gzip)
+    except ValueError as error:
+        parser.error(str(error))
+    print(f"Wrote {len(entries)} files and {os.path.join(args.output_dir, 'manifest.json')}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file